@@ -6,7 +6,7 @@ from datetime import datetime
 import threading
 from typing import Dict, List, Optional
 import json
-from utils.data_persistence import persistence
+from utils.data_persistence import get_persistence
 
 class APIIntegration:
     """Streamlit integration with the FastAPI order simulation backend"""
@@ -117,8 +117,7 @@ class APIIntegration:
                 
                 # Save orders to data persistence if we have a current run
                 if st.session_state.get('current_run_id'):
-                    for order in processed_orders:
-                        persistence.save_order(st.session_state.current_run_id, order)
+                    get_persistence().save_orders_bulk(st.session_state.current_run_id, processed_orders)
                 
                 return processed_orders
             else:
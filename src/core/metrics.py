@@ -9,7 +9,6 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from core.sim_engine import run_simulation
-from utils.data_persistence import persistence
 import threading
 
 try:
@@ -15,7 +15,7 @@ from core.metrics import metrics_section
 from core.analytics import analytics_tabs
 from core.data_management import data_management_tab
 from core.reports import reports_tab
-from utils.data_persistence import persistence, save_current_layout, start_new_simulation
+from utils.data_persistence import save_current_layout, start_new_simulation
 
 # --- HEADER ---
 st.markdown('<div class="main-header">Smart Warehouse Flow Simulator</div>', unsafe_allow_html=True)
@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
+import numpy as np
 import json
 import random
 import time
+from functools import partial
 
 def manhattan_distance(p1, p2):
     """
@@ -59,26 +61,41 @@ def calculate_order_distance(order_items, layout_metadata):
     packing_stations = layout_metadata["packing_stations"]
     
     # Step 1: Choose the nearest entry point to the first item
-    first_item = order_items[0]
-    nearest_entry = min(entry_points, key=lambda ep: manhattan_distance(first_item, ep))
-    entry_distance = manhattan_distance(first_item, nearest_entry)
+    # Distances are inlined rather than routed through manhattan_distance()
+    # since this runs once per generated order.
+    fx, fy = order_items[0]
+    entry_distance, i = min(
+        (abs(fx - ex) + abs(fy - ey), i) for i, (ex, ey) in enumerate(entry_points)
+    )
+    nearest_entry = entry_points[i]
     
     # Step 2: Choose the nearest packing station from the last item
-    last_item = order_items[-1]
-    nearest_packing = min(packing_stations, key=lambda ps: manhattan_distance(last_item, ps))
-    packing_distance = manhattan_distance(last_item, nearest_packing)
+    lx, ly = order_items[-1]
+    packing_distance, i = min(
+        (abs(lx - px) + abs(ly - py), i) for i, (px, py) in enumerate(packing_stations)
+    )
+    nearest_packing = packing_stations[i]
+    
+    # Single-item orders have no inter-item legs: Entry -> Item -> Packing Station
+    if len(order_items) == 1:
+        return {
+            "total_distance": entry_distance + packing_distance,
+            "path": [nearest_entry, order_items[0], nearest_packing],
+            "entry_point": nearest_entry,
+            "packing_station": nearest_packing,
+            "item_sequence": order_items,
+            "entry_distance": entry_distance,
+            "packing_distance": packing_distance,
+            "inter_item_distances": []
+        }
     
     # Step 3: Calculate total path distance
     # Path: Entry -> Item1 -> Item2 -> ... -> ItemN -> Packing Station
-    total_distance = entry_distance
-    
-    # Add distances between consecutive items
-    for i in range(len(order_items) - 1):
-        item_distance = manhattan_distance(order_items[i], order_items[i + 1])
-        total_distance += item_distance
-    
-    # Add distance from last item to packing station
-    total_distance += packing_distance
+    inter_item_distances = [
+        abs(ax - bx) + abs(ay - by)
+        for (ax, ay), (bx, by) in zip(order_items, order_items[1:])
+    ]
+    total_distance = entry_distance + sum(inter_item_distances) + packing_distance
     
     # Create path sequence
     path_sequence = [nearest_entry] + order_items + [nearest_packing]
@@ -91,10 +108,7 @@ def calculate_order_distance(order_items, layout_metadata):
         "item_sequence": order_items,
         "entry_distance": entry_distance,
         "packing_distance": packing_distance,
-        "inter_item_distances": [
-            manhattan_distance(order_items[i], order_items[i + 1])
-            for i in range(len(order_items) - 1)
-        ]
+        "inter_item_distances": inter_item_distances
     }
 
 def extract_layout_metadata(layout_data):
@@ -150,7 +164,7 @@ def calculate_distances(layout_metadata):
     # Calculate distances from shelves to packing stations
     for shelf in shelves:
         for station in packing_stations:
-            dist = manhattan_distance(shelf, station)
+            dist = abs(shelf[0] - station[0]) + abs(shelf[1] - station[1])
             distances["shelf_to_packing_station"].append({
                 "from": shelf,
                 "to": station,
@@ -160,7 +174,7 @@ def calculate_distances(layout_metadata):
     # Calculate distances from entry points to packing stations
     for entry in entry_points:
         for station in packing_stations:
-            dist = manhattan_distance(entry, station)
+            dist = abs(entry[0] - station[0]) + abs(entry[1] - station[1])
             distances["entry_to_packing_station"].append({
                 "from": entry,
                 "to": station,
@@ -170,7 +184,7 @@ def calculate_distances(layout_metadata):
     # Calculate distances from shelves to entry points
     for shelf in shelves:
         for entry in entry_points:
-            dist = manhattan_distance(shelf, entry)
+            dist = abs(shelf[0] - entry[0]) + abs(shelf[1] - entry[1])
             distances["shelf_to_entry"].append({
                 "from": shelf,
                 "to": entry,
@@ -181,7 +195,7 @@ def calculate_distances(layout_metadata):
     for i, shelf1 in enumerate(shelves):
         for j, shelf2 in enumerate(shelves):
             if i < j:  # Avoid duplicate pairs
-                dist = manhattan_distance(shelf1, shelf2)
+                dist = abs(shelf1[0] - shelf2[0]) + abs(shelf1[1] - shelf2[1])
                 distances["shelf_to_shelf"].append({
                     "from": shelf1,
                     "to": shelf2,
@@ -269,6 +283,67 @@ def run_order_simulation(layout_data, num_orders=50, items_per_order=5):
     
     return simulation_results
 
+def _analyze_orders(orders, layout_metadata):
+    """
+    Calculate path analyses for a batch of independent orders.
+    
+    Args:
+        orders: List of order item coordinate lists
+        layout_metadata: Dictionary containing coordinates of layout elements
+        
+    Returns:
+        list: Results of calculate_order_distance, in the same order as orders
+    """
+    return [calculate_order_distance(order_items, layout_metadata) for order_items in orders]
+
+@st.cache_data(show_spinner=False)
+def _generate_order_queue(layout_hash, num_orders, items_per_order, picker_speed_numeric, _layout_metadata):
+    """
+    Pre-generate the order queue for a real-time simulation.
+    
+    The random generator is seeded from the cache key, so the same layout and
+    order parameters always produce the same queue and repeated runs reuse it.
+    
+    Args:
+        layout_hash: Fingerprint of the layout from _layout_hash
+        num_orders: Number of orders to generate
+        items_per_order: Number of items per order
+        picker_speed_numeric: Numeric picker speed used to derive order times
+        _layout_metadata: Layout metadata the orders are drawn from
+        
+    Returns:
+        list: Order dictionaries with items, distance, time, and path analysis
+    """
+    rng = random.Random(hash((num_orders, items_per_order, layout_hash)))
+    shelf_positions = _layout_metadata["shelves"]
+    
+    # Sample sequentially so the queue stays reproducible, then analyze the
+    # independent orders as one batch
+    sampled_orders = []
+    for order_id in range(num_orders):
+        if shelf_positions:
+            order_items = rng.sample(shelf_positions, min(items_per_order, len(shelf_positions)))
+        else:
+            order_items = []
+        if order_items:
+            sampled_orders.append((order_id, order_items))
+    
+    order_analyses = _analyze_orders([items for _, items in sampled_orders], _layout_metadata)
+    
+    order_queue = []
+    for (order_id, order_items), order_analysis in zip(sampled_orders, order_analyses):
+        order_distance = order_analysis["total_distance"]
+        order_time = order_distance / picker_speed_numeric if picker_speed_numeric > 0 else 0
+        order_queue.append({
+            "order_id": f"ORD_{order_id:04d}",
+            "items": order_items,
+            "distance": order_distance,
+            "time": order_time,
+            "path_analysis": order_analysis
+        })
+    
+    return order_queue
+
 def run_realtime_order_simulation(layout_data, num_orders=50, items_per_order=5):
     """
     Run a real-time order simulation that progresses over time.
@@ -311,39 +386,26 @@ def run_realtime_order_simulation(layout_data, num_orders=50, items_per_order=5)
     picker_speed_label = st.session_state.get('picker_speed', 'Medium')
     picker_speed_numeric = get_picker_speed(picker_speed_label)
     
-    # Get shelf positions for order generation
-    shelf_positions = layout_metadata["shelves"]
-    
-    # Initialize or get current simulation state
-    if 'realtime_simulation_state' not in st.session_state:
+    # Initialize or get current simulation state; the order queue is rebuilt
+    # only when the layout or order parameters it was generated from change
+    queue_hash = (_layout_hash(layout_metadata), num_orders, items_per_order)
+    existing_state = st.session_state.get('realtime_simulation_state')
+    if existing_state is None or existing_state.get("order_queue_hash") != queue_hash:
+        order_queue = _generate_order_queue(*queue_hash, picker_speed_numeric, layout_metadata)
         st.session_state.realtime_simulation_state = {
             "total_distance": 0,
             "total_time": 0,
             "completed_orders": 0,
             "current_order_index": 0,
-            "order_queue": [],
+            "order_queue": order_queue,
+            "order_queue_hash": queue_hash,
+            "order_distances_np": np.asarray([order["distance"] for order in order_queue], dtype=np.int32),
+            "order_times_np": np.asarray([order["time"] for order in order_queue], dtype=np.float64),
             "simulation_start_time": time.time(),
             "last_update_time": time.time()
         }
-        # Pre-generate all orders
-        for order_id in range(num_orders):
-            if shelf_positions:
-                order_items = random.sample(shelf_positions, min(items_per_order, len(shelf_positions)))
-            else:
-                order_items = []
-            if order_items:
-                order_analysis = calculate_order_distance(order_items, layout_metadata)
-                order_distance = order_analysis["total_distance"]
-                order_time = order_distance / picker_speed_numeric if picker_speed_numeric > 0 else 0
-                st.session_state.realtime_simulation_state["order_queue"].append({
-                    "order_id": f"ORD_{order_id:04d}",
-                    "items": order_items,
-                    "distance": order_distance,
-                    "time": order_time,
-                    "path_analysis": order_analysis
-                })
         # Debug: Show order queue generation
-        st.session_state['debug_order_queue_generated'] = len(st.session_state.realtime_simulation_state["order_queue"])
+        st.session_state['debug_order_queue_generated'] = len(order_queue)
     # Do NOT reset state just because simulation_running is False
     
     # Get current state
@@ -351,12 +413,13 @@ def run_realtime_order_simulation(layout_data, num_orders=50, items_per_order=5)
     current_time = time.time()
 
     # Process all remaining orders immediately (no 1 second rule)
-    while state["current_order_index"] < len(state["order_queue"]):
-        current_order = state["order_queue"][state["current_order_index"]]
-        state["total_distance"] += current_order["distance"]
-        state["total_time"] += current_order["time"]
-        state["completed_orders"] += 1
-        state["current_order_index"] += 1
+    start_index = state["current_order_index"]
+    remaining = len(state["order_queue"]) - start_index
+    if remaining > 0:
+        state["total_distance"] += int(state["order_distances_np"][start_index:].sum())
+        state["total_time"] += float(state["order_times_np"][start_index:].sum())
+        state["completed_orders"] += remaining
+        state["current_order_index"] = len(state["order_queue"])
         state["last_update_time"] = current_time
         st.session_state['last_simulation_update'] = current_time
 
@@ -542,6 +605,78 @@ def create_custom_layout(uploaded_layout, grid_width, grid_height):
     
     return create_grid_layout(grid_width, grid_height)
 
+def _layout_hash(layout_metadata):
+    """
+    Compute a cheap fingerprint of a layout's element coordinates.
+    
+    Args:
+        layout_metadata: Dictionary containing coordinates of layout elements
+        
+    Returns:
+        int: Hash of the shelf, packing station, and entry point coordinates
+    """
+    return hash((
+        tuple(layout_metadata["shelves"]),
+        tuple(layout_metadata["packing_stations"]),
+        tuple(layout_metadata["entry_points"])
+    ))
+
+@st.cache_data(show_spinner=False)
+def _metadata_json(layout_hash, completed_orders, totals, _complete_metadata):
+    """
+    Serialize the layout metadata download.
+    
+    Only the small key arguments are hashed by Streamlit (the leading underscore
+    excludes the metadata dict), so the JSON string is rebuilt only when the
+    layout or simulation totals change rather than on every rerun.
+    
+    Args:
+        layout_hash: Fingerprint of the layout from _layout_hash
+        completed_orders: Number of completed orders in the simulation
+        totals: Tuple of remaining values the metadata depends on
+        _complete_metadata: Metadata dictionary to serialize
+        
+    Returns:
+        str: Compact JSON representation of the metadata
+    """
+    return json.dumps(_complete_metadata, separators=(',', ':'))
+
+def _build_order_details_snapshot(simulation_results):
+    """
+    Select the per-order details included in the metadata download.
+    
+    Args:
+        simulation_results: Results from run_realtime_order_simulation
+        
+    Returns:
+        list: The first 5 completed orders, for reference
+    """
+    return simulation_results["order_details"][:5]
+
+def _download_metadata_json(layout_hash, totals, complete_metadata, simulation_results):
+    """
+    Build the metadata download when the user clicks the download button.
+    
+    Args:
+        layout_hash: Fingerprint of the layout from _layout_hash
+        totals: Tuple of remaining values the metadata depends on
+        complete_metadata: Metadata dictionary without order details
+        simulation_results: Results from run_realtime_order_simulation
+        
+    Returns:
+        str: JSON representation of the metadata including order details
+    """
+    order_results = dict(
+        complete_metadata["order_simulation_results"],
+        order_details=_build_order_details_snapshot(simulation_results)
+    )
+    return _metadata_json(
+        layout_hash,
+        simulation_results["completed_orders"],
+        totals,
+        dict(complete_metadata, order_simulation_results=order_results)
+    )
+
 def warehouse_layout_section():
     import json
     import random
@@ -706,8 +841,8 @@ def warehouse_layout_section():
             "simulation_parameters": {
                 "num_orders": num_orders,
                 "items_per_order": items_per_order
-            },
-            "order_details": simulation_results["order_details"][:5]  # Include first 5 orders for reference
+            }
+            # "order_details" is added by _download_metadata_json on download
         },
         "efficient_path_algorithm": {
             "description": "Most Efficient Path Calculation Algorithm",
@@ -737,7 +872,20 @@ def warehouse_layout_section():
     
     # Remove all metrics, progress bar, simulation status, and debug info from below the warehouse layout grid
     # Only keep the download button for layout metadata
-    metadata_json = json.dumps(complete_metadata, indent=2)
+    # Serialization is deferred until the button is clicked
+    metadata_json = partial(
+        _download_metadata_json,
+        _layout_hash(layout_metadata),
+        (
+            simulation_results["total_distance"],
+            simulation_results["total_time"],
+            picker_speed_label,
+            num_orders,
+            items_per_order
+        ),
+        complete_metadata,
+        simulation_results
+    )
     st.download_button(
         label="⬇️ Download Layout Metadata with Simulation Results (JSON)",
         data=metadata_json,
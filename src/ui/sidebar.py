@@ -1,10 +1,12 @@
 import streamlit as st
 import os
-from custom_layout_builder import custom_layout_builder
-from utils.warehouse_data_loader import load_sample_warehouse_data
+from utils.warehouse_data_loader import WarehouseDataLoader
 
-def sidebar_config():
-    st.sidebar.markdown("""
+_LAYOUT_OPTIONS = ("Custom Layout", "Grid Layout", "L-Shape Layout", "U-Shape Layout", "Sample Layouts")
+_PICKER_SPEED_OPTIONS = ('Slow', 'Medium', 'Fast')
+_SIMULATION_SPEED_OPTIONS = ('1x', '2x', '5x', '10x')
+
+_SIDEBAR_CSS = """
     <style>
         .sidebar-section-title {
             font-size: 1.2rem;
@@ -25,15 +27,61 @@ def sidebar_config():
             margin-bottom: 0.2rem;
         }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+def _pretty_layout(name: str) -> str:
+    """Display label for a sample layout name, e.g. 'walmart_style' -> 'Walmart Style'."""
+    return name.replace('_', ' ').title()
+
+@st.cache_resource
+def _get_loader():
+    """Shared WarehouseDataLoader, constructed once per server process."""
+    return WarehouseDataLoader()
+
+@st.cache_data
+def _get_available_layouts():
+    """Names of the bundled sample layouts."""
+    return _get_loader().get_available_layouts()
+
+@st.cache_data
+def _load_layout_meta(name: str):
+    """Summary of a sample layout for the sidebar, parsed once per sample."""
+    loader = _get_loader()
+    data = loader.load_layout_from_json(loader.sample_layouts[name])
+    if not data:
+        return None
+    return {
+        "name": data["name"],
+        "grid_width": data["grid_width"],
+        "grid_height": data["grid_height"],
+        "n_shelves": len(data["shelves"]),
+        "n_stations": len(data["stations"])
+    }
+
+@st.cache_data(show_spinner=False)
+def _csv_rowcount(path: str, mtime: float) -> int:
+    """Number of data rows in a CSV file, counted without parsing it."""
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f) - 1
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _db_stats():
+    """Database statistics, reused for a few seconds across repeated views."""
+    from utils.data_persistence import get_persistence
+    return get_persistence().get_database_stats()
+
+def sidebar_config():
+    # Streamlit drops elements that aren't re-emitted, so the styles are sent every run
+    st.sidebar.markdown(_SIDEBAR_CSS, unsafe_allow_html=True)
     st.sidebar.markdown('<div class="sidebar-section-title">Configuration</div>', unsafe_allow_html=True)
     st.sidebar.markdown('<div class="sidebar-section-title">Warehouse Layout</div>', unsafe_allow_html=True)
     
+    available_layouts = _get_available_layouts()
+    
     # Add sample layouts option - using radio buttons to prevent typing
-    layout_options = ["Custom Layout", "Grid Layout", "L-Shape Layout", "U-Shape Layout", "Sample Layouts"]
     st.session_state['layout_type'] = st.sidebar.radio(
         "Select Layout Type",
-        layout_options,
+        _LAYOUT_OPTIONS,
         key="layout_type_select",
         help="Choose from predefined layout types"
     )
@@ -44,24 +92,24 @@ def sidebar_config():
         st.sidebar.markdown("### Sample Warehouse Layouts")
         st.sidebar.markdown("Load pre-configured layouts from major retailers")
         
-        from utils.warehouse_data_loader import WarehouseDataLoader
-        loader = WarehouseDataLoader()
-        available_layouts = loader.get_available_layouts()
+        loader = _get_loader()
         
         selected_sample = st.sidebar.selectbox(
             "Choose a warehouse layout:",
             available_layouts,
-            format_func=lambda x: x.replace('_', ' ').title()
+            format_func=_pretty_layout
         )
         
         if selected_sample:
             # Display layout info
-            layout_data = loader.load_layout_from_json(loader.sample_layouts[selected_sample])
-            if layout_data:
-                st.sidebar.markdown(f"**{layout_data['name']}**")
-                st.sidebar.markdown(f"Size: {layout_data['grid_width']}x{layout_data['grid_height']}")
-                st.sidebar.markdown(f"Shelves: {len(layout_data['shelves'])}")
-                st.sidebar.markdown(f"Stations: {len(layout_data['stations'])}")
+            layout_meta = _load_layout_meta(selected_sample)
+            if layout_meta:
+                st.sidebar.markdown(
+                    f"**{layout_meta['name']}**  \n"
+                    f"Size: {layout_meta['grid_width']}x{layout_meta['grid_height']}  \n"
+                    f"Shelves: {layout_meta['n_shelves']}  \n"
+                    f"Stations: {layout_meta['n_stations']}"
+                )
         
         if st.sidebar.button("Load Sample Layout"):
             grid_data = loader.load_and_convert_layout(selected_sample)
@@ -77,13 +125,15 @@ def sidebar_config():
                 
                 st.session_state.custom_layout_state.update({
                     'grid_data': grid_data['grid_data'],
-                    'shelves': [cell for cell in grid_data['grid_data'] if cell['type'] == 'Shelf'],
-                    'stations': [cell for cell in grid_data['grid_data'] if cell['type'] == 'Packing Station'],
-                    'entry_exit': next((cell for cell in grid_data['grid_data'] if cell['type'] == 'Entry/Exit'), None),
+                    'shelves': grid_data['shelves'],
+                    'stations': grid_data['stations'],
+                    'entry_exit': grid_data['entry_exit'],
                     'layout_name': grid_data['layout_name'],
                     'layout_description': grid_data['layout_description']
                 })
                 
+                st.session_state['_has_sample_layout'] = True
+                
                 st.sidebar.success(f"Loaded {grid_data['layout_name']} successfully!")
                 st.rerun()
     
@@ -101,38 +151,48 @@ def sidebar_config():
         st.session_state['uploaded_layout'] = None
     
     # Clear sample layout when switching to other layout types
-    if st.session_state['layout_type'] != "Sample Layouts" and 'custom_layout_state' in st.session_state and st.session_state.custom_layout_state.get('grid_data'):
+    if st.session_state.get('_has_sample_layout') and st.session_state['layout_type'] != "Sample Layouts":
         if st.sidebar.button("Clear Sample Layout"):
             st.session_state.custom_layout_state = {}
+            st.session_state['_has_sample_layout'] = False
             st.sidebar.success("Sample layout cleared!")
             st.rerun()
     
-    st.session_state['grid_width'] = st.sidebar.slider("Grid Width", 5, 20, 12)
-    st.session_state['grid_height'] = st.sidebar.slider("Grid Height", 5, 20, 8)
-    st.sidebar.subheader("Simulation Settings")
-    st.session_state['num_pickers'] = st.sidebar.slider("Number of Pickers", 1, 10, 3)
-    st.session_state['picker_speed'] = st.sidebar.select_slider(
-        "Picker Speed",
-        options=['Slow', 'Medium', 'Fast'],
-        value='Medium'
-    )
-    st.sidebar.subheader("Order Settings")
-    st.session_state['num_orders'] = st.sidebar.slider("Number of Orders", 10, 500, 50)
-    st.session_state['items_per_order'] = st.sidebar.slider("Items per Order", 1, 20, 5)
+    # Static settings are batched in a form so dragging a slider doesn't rerun
+    # the whole app. Widgets are bound to session state by key, so values are
+    # committed on Apply and defaults come from the session state initialized
+    # in app.py.
+    with st.sidebar.form("sim_config"):
+        # Upper bound covers the largest bundled sample layout (22x16)
+        st.slider("Grid Width", 5, 25, key='grid_width')
+        st.slider("Grid Height", 5, 25, key='grid_height')
+        st.subheader("Simulation Settings")
+        st.slider("Number of Pickers", 1, 10, key='num_pickers')
+        st.select_slider(
+            "Picker Speed",
+            options=_PICKER_SPEED_OPTIONS,
+            key='picker_speed'
+        )
+        st.subheader("Order Settings")
+        st.slider("Number of Orders", 10, 500, key='num_orders')
+        st.slider("Items per Order", 1, 20, key='items_per_order')
+        st.subheader("Simulation Controls")
+        st.select_slider(
+            "Simulation Speed",
+            options=_SIMULATION_SPEED_OPTIONS,
+            key='simulation_speed'
+        )
+        st.form_submit_button("Apply")
     
     # Sample orders section
     st.sidebar.markdown("---")
     st.sidebar.markdown("### Sample Orders")
     st.sidebar.markdown("Load pre-generated order data")
     
-    from utils.warehouse_data_loader import WarehouseDataLoader
-    loader = WarehouseDataLoader()
-    available_layouts = loader.get_available_layouts()
-    
     selected_order_layout = st.sidebar.selectbox(
         "Choose sample orders:",
         available_layouts,
-        format_func=lambda x: x.replace('_', ' ').title(),
+        format_func=_pretty_layout,
         key="sample_orders_select"
     )
     
@@ -140,12 +200,12 @@ def sidebar_config():
         try:
             orders_file = f"sample_data/{selected_order_layout}_orders.csv"
             if os.path.exists(orders_file):
-                # Load the CSV file and store it in session state
-                import pandas as pd
-                orders_df = pd.read_csv(orders_file)
-                st.session_state['sample_orders_data'] = orders_df
+                # The sidebar only shows how many orders there are, so the
+                # file is line-counted rather than parsed
+                orders_rowcount = _csv_rowcount(orders_file, os.path.getmtime(orders_file))
                 st.session_state['current_orders_file'] = orders_file
-                st.sidebar.success(f"Loaded {len(orders_df)} orders from {selected_order_layout.replace('_', ' ').title()}")
+                st.session_state['current_orders_rowcount'] = orders_rowcount
+                st.sidebar.success(f"Loaded {orders_rowcount} orders from {_pretty_layout(selected_order_layout)}")
                 st.rerun()
             else:
                 st.sidebar.error(f"Orders file not found: {orders_file}")
@@ -153,14 +213,13 @@ def sidebar_config():
                             st.sidebar.error(f"Error loading orders: {str(e)}")
     
     # Show current loaded orders info
-    if 'sample_orders_data' in st.session_state:
-        orders_df = st.session_state['sample_orders_data']
-        st.sidebar.markdown(f"**Current Orders:** {len(orders_df)} items")
+    if 'current_orders_file' in st.session_state:
+        st.sidebar.markdown(f"**Current Orders:** {st.session_state.get('current_orders_rowcount', 0)} items")
         st.sidebar.markdown(f"**File:** {st.session_state.get('current_orders_file', 'Unknown')}")
         
         if st.sidebar.button("Clear Sample Orders", key="clear_sample_orders"):
-            del st.session_state['sample_orders_data']
-            del st.session_state['current_orders_file']
+            st.session_state.pop('current_orders_file', None)
+            st.session_state.pop('current_orders_rowcount', None)
             st.sidebar.success("Sample orders cleared!")
             st.rerun()
     
@@ -171,29 +230,23 @@ def sidebar_config():
         type=['csv'],
         help="CSV should have columns: order_id, item_id, shelf_location_x, shelf_location_y, zone, item_type, priority, quantity"
     )
-    st.sidebar.subheader("Simulation Controls")
-    st.session_state['simulation_speed'] = st.sidebar.select_slider(
-        "Simulation Speed",
-        options=['1x', '2x', '5x', '10x'],
-        value='5x'
-    )
     
     # Data Persistence Controls
     st.sidebar.markdown("---")
     st.sidebar.markdown("### Data Persistence")
     
-    col1, col2 = st.columns(2)
+    col1, col2 = st.sidebar.columns(2)
     with col1:
-        if st.sidebar.button("Save Layout"):
+        if st.button("Save Layout"):
             from utils.data_persistence import save_current_layout
             layout_id = save_current_layout()
             if layout_id:
+                _db_stats.clear()
                 st.sidebar.success(f"Layout saved!")
     
     with col2:
-        if st.sidebar.button("View Stats"):
-            from utils.data_persistence import persistence
-            stats = persistence.get_database_stats()
+        if st.button("View Stats"):
+            stats = _db_stats()
             st.sidebar.json(stats)
     
     # Auto-save toggle
@@ -4,19 +4,215 @@ Advanced Layout Optimizer for Smart Warehouse Simulator
 
 This module implements a comprehensive layout optimization system that ensures:
 1. Proper aisle spacing (1 empty row/column every 2 shelf rows/columns)
-2. Reachability validation using A* pathfinding
+2. Reachability validation using breadth-first search
 3. Category-based shelf encoding
 4. Structured JSON output
 5. Fallback mechanisms for invalid layouts
+
+Layout state is kept in light structures (the occupancy grid, NumPy
+coordinate arrays and plain lists). To keep a snapshot, hold on to those or
+copy the arrays; don't deepcopy the Shelf/Robot object graph.
 """
 
 import json
+import logging
 import random
-import heapq
-from typing import List, Dict, Tuple, Optional, Set
+import numpy as np
+from typing import List, Dict, Tuple, Optional, Set, NamedTuple
 from dataclasses import dataclass
 from enum import Enum
-import copy
+from collections import Counter, deque
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+def _label_components_kernel(occ, w, h):
+    """
+    Label the 4-connected components of free cells in the occupancy grid
+    occ[x, y], returning flat int32 labels indexed y * w + x with -1 for
+    occupied cells.
+    """
+    n = w * h
+    labels = np.full(n, -1, dtype=np.int32)
+    queue = np.empty(n, dtype=np.int32)
+    label = 0
+    for seed in range(n):
+        if labels[seed] >= 0 or occ[seed % w, seed // w]:
+            continue
+        labels[seed] = label
+        queue[0] = seed
+        head = 0
+        tail = 1
+        while head < tail:
+            current = queue[head]
+            head += 1
+            cx = current % w
+            cy = current // w
+            for d in range(4):
+                nx = cx
+                ny = cy
+                if d == 0:
+                    ny += 1
+                elif d == 1:
+                    nx += 1
+                elif d == 2:
+                    ny -= 1
+                else:
+                    nx -= 1
+                if nx < 0 or nx >= w or ny < 0 or ny >= h:
+                    continue
+                neighbor = ny * w + nx
+                if labels[neighbor] >= 0 or occ[nx, ny]:
+                    continue
+                labels[neighbor] = label
+                queue[tail] = neighbor
+                tail += 1
+        label += 1
+    
+    return labels
+
+def _label_components_py(occ, w, h):
+    """
+    Pure-Python component labelling with the same output as
+    _label_components_kernel.
+    
+    Indexing NumPy scalars per node is slow without the JIT, so the grid is
+    flattened to bytes once and the fill runs on a list and a deque.
+    """
+    n = w * h
+    blocked = occ.T.tobytes()  # (h, w) C order, so blocked[y * w + x]
+    labels = [-1] * n
+    label = 0
+    for seed in range(n):
+        if labels[seed] >= 0 or blocked[seed]:
+            continue
+        labels[seed] = label
+        queue = deque([seed])
+        while queue:
+            current = queue.popleft()
+            cx = current % w
+            for neighbor, valid in ((current + w, current + w < n),
+                                    (current + 1, cx + 1 < w),
+                                    (current - w, current >= w),
+                                    (current - 1, cx > 0)):
+                if not valid or labels[neighbor] >= 0 or blocked[neighbor]:
+                    continue
+                labels[neighbor] = label
+                queue.append(neighbor)
+        label += 1
+    
+    return np.array(labels, dtype=np.int32)
+
+def _flood_fill_kernel(occ, w, h, seeds):
+    """
+    Multi-source BFS from the flat node ids in seeds, returning a uint8 mask
+    of the seeds plus every free cell reachable from any of them.
+    
+    Seeds are expanded even when occupied, so the mask for a cell equals
+    whether a single-source search from some seed would reach it.
+    """
+    n = w * h
+    mask = np.zeros(n, dtype=np.uint8)
+    queue = np.empty(n, dtype=np.int32)
+    tail = 0
+    for seed in seeds:
+        if not mask[seed]:
+            mask[seed] = 1
+            queue[tail] = seed
+            tail += 1
+    head = 0
+    
+    while head < tail:
+        current = queue[head]
+        head += 1
+        cx = current % w
+        cy = current // w
+        for d in range(4):
+            nx = cx
+            ny = cy
+            if d == 0:
+                ny += 1
+            elif d == 1:
+                nx += 1
+            elif d == 2:
+                ny -= 1
+            else:
+                nx -= 1
+            if nx < 0 or nx >= w or ny < 0 or ny >= h:
+                continue
+            neighbor = ny * w + nx
+            if mask[neighbor] or occ[nx, ny]:
+                continue
+            mask[neighbor] = 1
+            queue[tail] = neighbor
+            tail += 1
+    
+    return mask
+
+def _flood_fill_py(occ, w, h, seeds):
+    """Pure-Python multi-source BFS with the same semantics as _flood_fill_kernel"""
+    n = w * h
+    blocked = occ.T.tobytes()  # (h, w) C order, so blocked[y * w + x]
+    mask = bytearray(n)
+    queue = deque()
+    for seed in seeds:
+        if not mask[seed]:
+            mask[seed] = 1
+            queue.append(seed)
+    
+    while queue:
+        current = queue.popleft()
+        cx = current % w
+        for neighbor, valid in ((current + w, current + w < n),
+                                (current + 1, cx + 1 < w),
+                                (current - w, current >= w),
+                                (current - 1, cx > 0)):
+            if not valid or mask[neighbor] or blocked[neighbor]:
+                continue
+            mask[neighbor] = 1
+            queue.append(neighbor)
+    
+    return mask
+
+if njit is not None:
+    _label_components = njit(cache=True)(_label_components_kernel)
+    _flood_fill = njit(cache=True)(_flood_fill_kernel)
+else:
+    _label_components = _label_components_py
+    _flood_fill = _flood_fill_py
+
+@lru_cache(maxsize=8)
+def _placement_mask(rows: int, columns: int, for_shelves: bool) -> np.ndarray:
+    """
+    Read-only boolean (columns, rows) grid of cells that can hold a shelf
+    (outside the aisles) or a packing station (on the edge).
+    
+    This depends only on the grid size, so it is worked out once per grid and
+    reused across generation attempts.
+    """
+    xs, ys = np.meshgrid(np.arange(columns), np.arange(rows), indexing='ij')
+    
+    if for_shelves:
+        # Every 3rd row and column is an aisle
+        mask = (xs % 3 != 2) & (ys % 3 != 2)
+    else:
+        mask = (xs == 0) | (xs == columns - 1) | (ys == 0) | (ys == rows - 1)
+    
+    mask.setflags(write=False)
+    return mask
+
+def _near_entry_mask(rows: int, columns: int, entries, min_entry_distance: int) -> np.ndarray:
+    """Boolean (columns, rows) grid of cells closer than min_entry_distance to any entry"""
+    xs, ys = np.meshgrid(np.arange(columns), np.arange(rows), indexing='ij')
+    mask = np.zeros((columns, rows), dtype=bool)
+    for entry in entries:
+        mask |= (np.abs(xs - entry.x) + np.abs(ys - entry.y)) < min_entry_distance
+    return mask
 
 class Category(Enum):
     """Product categories for shelves"""
@@ -26,28 +222,25 @@ class Category(Enum):
     D = "d"
     E = "e"
 
-@dataclass
-class Position:
+class Position(NamedTuple):
     """Represents a position in the warehouse grid"""
     x: int
     y: int
     
-    def __hash__(self):
-        return hash((self.x, self.y))
-    
-    def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
-    
-    def __lt__(self, other):
-        # For heapq comparison, use tuple comparison
-        return (self.x, self.y) < (other.x, other.y)
-    
     def to_list(self) -> List[int]:
         return [self.x, self.y]
 
+# Shelf pattern for create_fallback_layout that respects aisle spacing.
+# Aisle positions: x%3==2 or y%3==2 (columns 2,5,8,11 and rows 2,5,8,11)
+# Valid shelf positions: x%3!=2 and y%3!=2
+_FALLBACK_SHELF_POSITIONS = tuple(
+    Position(x, y) for x in (0, 1, 3, 4, 6, 7, 9, 10) for y in (0, 1, 3, 4, 6, 7, 9, 10)
+)
+
 @dataclass
 class Shelf:
     """Represents a shelf with position and category"""
+    __slots__ = ('position', 'category')
     position: Position
     category: str
     
@@ -60,6 +253,7 @@ class Shelf:
 @dataclass
 class Robot:
     """Represents a robot with ID and position"""
+    __slots__ = ('id', 'position')
     id: str
     position: Position
     
@@ -99,8 +293,44 @@ class AdvancedLayoutOptimizer:
         self.drop_zones: List[Position] = []
         self.robots: List[Robot] = []
         
-        # Validation cache
-        self._reachability_cache: Dict[Tuple[Position, Position], bool] = {}
+        # Occupancy grid indexed [x, y]; non-zero where a shelf, packing
+        # station or robot stands. Kept in step with the lists above, and
+        # rebuilt if the lists are appended to or reassigned from outside.
+        self._occupied = np.zeros((columns, rows), dtype=np.uint8)
+        self._occupancy_key = self._layout_signature()
+        
+        # Connected-component label per free cell, indexed [x, y] (-1 where
+        # occupied). Computed lazily and dropped whenever occupancy changes.
+        self._component: Optional[np.ndarray] = None
+        
+        # Cells reachable from the entry points, filled in by validate_layout
+        self._reachable_mask = None
+    
+    @property
+    def entry_points(self) -> List[Position]:
+        return self._entry_points
+    
+    @entry_points.setter
+    def entry_points(self, points: List[Position]):
+        # Assign a new list to change the entry points, so the candidate
+        # caches that depend on them are rebuilt
+        self._entry_points = points
+        self._recompute_candidate_caches()
+    
+    def _recompute_candidate_caches(self):
+        """
+        Cells that may hold a shelf or packing station before anything is
+        placed, as (K, 2) arrays of (x, y) in row-major order.
+        
+        These only change with the entry points, so they are built here rather
+        than on every placement attempt.
+        """
+        rows, columns, points = self.rows, self.columns, self._entry_points
+        shelf_mask = _placement_mask(rows, columns, True) & ~_near_entry_mask(rows, columns, points, 2)
+        station_mask = _placement_mask(rows, columns, False) & ~_near_entry_mask(rows, columns, points, 3)
+        # Transpose so nonzero walks y-major, matching the row-by-row scan order
+        self._shelf_candidates_base = np.column_stack(np.nonzero(shelf_mask.T)[::-1])
+        self._station_candidates_base = np.column_stack(np.nonzero(station_mask.T)[::-1])
     
     def is_valid_position(self, pos: Position) -> bool:
         """Check if position is within grid bounds"""
@@ -140,128 +370,113 @@ class AdvancedLayoutOptimizer:
     
     def is_reachable(self, start: Position, goal: Position) -> bool:
         """
-        Check if goal is reachable from start using A* pathfinding
+        Check if goal is reachable from start using breadth-first search
         """
-        # Check cache first
-        cache_key = (start, goal)
-        if cache_key in self._reachability_cache:
-            return self._reachability_cache[cache_key]
-        
-        # A* pathfinding implementation
-        open_set = [(0, start)]
-        closed_set = set()
-        came_from = {}
-        g_score = {start: 0}
-        f_score = {start: self.get_manhattan_distance(start, goal)}
-        
-        while open_set:
-            current_f, current = heapq.heappop(open_set)
-            
-            if current == goal:
-                # Cache the result
-                self._reachability_cache[cache_key] = True
-                return True
-            
-            closed_set.add(current)
-            
-            for neighbor in self.get_neighbors(current):
-                if neighbor in closed_set:
-                    continue
-                
-                # Check if neighbor is blocked by a shelf or packing station
-                if self.is_position_occupied(neighbor):
-                    continue
-                
-                tentative_g = g_score[current] + 1
-                
-                if neighbor not in g_score or tentative_g < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g
-                    f_score[neighbor] = tentative_g + self.get_manhattan_distance(neighbor, goal)
-                    
-                    if neighbor not in [pos for _, pos in open_set]:
-                        heapq.heappush(open_set, (f_score[neighbor], neighbor))
+        if start == goal:
+            return True
+        if not (self.is_valid_position(start) and self.is_valid_position(goal)):
+            return False
         
-        # Cache the result
-        self._reachability_cache[cache_key] = False
-        return False
+        # The grid is undirected, so goal is reachable iff it is free and
+        # shares a component with start or, when start itself is occupied,
+        # with one of start's free neighbours
+        component = self._components()
+        goal_component = component[goal.x, goal.y]
+        if goal_component < 0:
+            return False
+        if component[start.x, start.y] == goal_component:
+            return True
+        return any(component[n.x, n.y] == goal_component for n in self.get_neighbors(start))
     
     def is_position_occupied(self, pos: Position) -> bool:
         """Check if a position is occupied by a shelf, packing station, or robot"""
-        # Check shelves
+        self._ensure_occupancy()
+        return self.is_valid_position(pos) and bool(self._occupied[pos.x, pos.y])
+    
+    def _layout_signature(self) -> Tuple[int, ...]:
+        """Identity and length of the placement lists, to spot outside edits"""
+        return (id(self.shelves), len(self.shelves),
+                id(self.packing_stations), len(self.packing_stations),
+                id(self.robots), len(self.robots))
+    
+    def _clear_occupancy(self):
+        """Empty the occupancy grid and drop everything derived from it"""
+        self._occupied.fill(0)
+        self._component = None
+        self._reachable_mask = None
+        self._occupancy_key = self._layout_signature()
+    
+    def _mark_occupied(self, pos: Position):
+        """Record pos in the occupancy grid"""
+        if self.is_valid_position(pos):
+            self._occupied[pos.x, pos.y] = 1
+            self._component = None
+            self._reachable_mask = None
+        self._occupancy_key = self._layout_signature()
+    
+    def _ensure_occupancy(self):
+        """Rebuild the occupancy grid if the lists were changed from outside"""
+        if self._occupancy_key != self._layout_signature():
+            self._sync_occupancy()
+    
+    def _components(self) -> np.ndarray:
+        """Component labels for the current occupancy, indexed [x, y]"""
+        self._ensure_occupancy()
+        if self._component is None:
+            labels = _label_components(self._occupied, self.columns, self.rows)
+            self._component = labels.reshape(self.rows, self.columns).T
+        return self._component
+    
+    @staticmethod
+    def _coords(positions: List[Position]) -> np.ndarray:
+        """Positions as an (N, 2) int32 array of (x, y)"""
+        return np.array(positions, dtype=np.int32).reshape(-1, 2)
+    
+    def _in_grid(self, coords: np.ndarray) -> np.ndarray:
+        """Boolean per row of an (N, 2) coordinate array: inside the grid"""
+        return ((coords[:, 0] >= 0) & (coords[:, 0] < self.columns)
+                & (coords[:, 1] >= 0) & (coords[:, 1] < self.rows))
+    
+    def _reachable_from(self, sources: np.ndarray):
+        """Flat mask of cells reachable from any of the given (N, 2) coordinates"""
+        sources = sources[self._in_grid(sources)]
+        seeds = sources[:, 1] * self.columns + sources[:, 0]
+        return _flood_fill(self._occupied, self.columns, self.rows, seeds)
+    
+    def _in_mask(self, mask, coords: np.ndarray) -> np.ndarray:
+        """Look up (N, 2) coordinates in a flat mask returned by _reachable_from"""
+        inside = self._in_grid(coords)
+        found = np.zeros(len(coords), dtype=bool)
+        found[inside] = np.asarray(mask)[coords[inside, 1] * self.columns + coords[inside, 0]] != 0
+        return found
+    
+    def _sync_occupancy(self):
+        """Rebuild the occupancy grid from the shelf, station and robot lists"""
+        self._clear_occupancy()
         for shelf in self.shelves:
-            if shelf.position == pos:
-                return True
-        
-        # Check packing stations
+            self._mark_occupied(shelf.position)
         for station in self.packing_stations:
-            if station == pos:
-                return True
-        
-        # Check robots
+            self._mark_occupied(station)
         for robot in self.robots:
-            if robot.position == pos:
-                return True
-        
-        return False
+            self._mark_occupied(robot.position)
+    
+    def _free_candidates(self, base: np.ndarray) -> np.ndarray:
+        """Rows of a (K, 2) candidate array that are not yet occupied"""
+        self._ensure_occupancy()
+        return base[self._occupied[base[:, 0], base[:, 1]] == 0]
+    
+    def _shelf_candidates(self) -> np.ndarray:
+        """Free shelf cells as a (K, 2) array of (x, y)"""
+        return self._free_candidates(self._shelf_candidates_base)
     
     def find_valid_shelf_positions(self) -> List[Position]:
         """Find all valid positions for shelves considering aisle spacing"""
-        valid_positions = []
-        
-        for y in range(self.rows):
-            for x in range(self.columns):
-                pos = Position(x, y)
-                
-                # Skip if it's an aisle position
-                if self.is_aisle_position(pos):
-                    continue
-                
-                # Skip if already occupied
-                if self.is_position_occupied(pos):
-                    continue
-                
-                # Skip if too close to entry points
-                too_close_to_entry = False
-                for entry in self.entry_points:
-                    if self.get_manhattan_distance(pos, entry) < 2:
-                        too_close_to_entry = True
-                        break
-                
-                if too_close_to_entry:
-                    continue
-                
-                valid_positions.append(pos)
-        
-        return valid_positions
+        return [Position(x, y) for x, y in self._shelf_candidates().tolist()]
     
     def find_valid_packing_station_positions(self) -> List[Position]:
         """Find valid positions for packing stations"""
-        valid_positions = []
-        
-        for y in range(self.rows):
-            for x in range(self.columns):
-                pos = Position(x, y)
-                
-                # Skip if already occupied
-                if self.is_position_occupied(pos):
-                    continue
-                
-                # Skip if too close to entry points
-                too_close_to_entry = False
-                for entry in self.entry_points:
-                    if self.get_manhattan_distance(pos, entry) < 3:
-                        too_close_to_entry = True
-                        break
-                
-                if too_close_to_entry:
-                    continue
-                
-                # Prefer positions near the edges for packing stations
-                if x == 0 or x == self.columns - 1 or y == 0 or y == self.rows - 1:
-                    valid_positions.append(pos)
-        
-        return valid_positions
+        free = self._free_candidates(self._station_candidates_base)
+        return [Position(x, y) for x, y in free.tolist()]
     
     def validate_layout(self) -> Dict:
         """
@@ -273,51 +488,36 @@ class AdvancedLayoutOptimizer:
         issues = []
         warnings = []
         
-        # Check if all shelves are reachable from at least one entry point
-        unreachable_shelves = []
-        for shelf in self.shelves:
-            reachable = False
-            for entry in self.entry_points:
-                if self.is_reachable(entry, shelf.position):
-                    reachable = True
-                    break
-            
-            if not reachable:
-                unreachable_shelves.append(shelf.position)
+        self._ensure_occupancy()
+        
+        shelf_xy = self._coords([shelf.position for shelf in self.shelves])
+        station_xy = self._coords(self.packing_stations)
+        
+        # Check if all shelves are reachable from at least one entry point.
+        # One flood fill from all entries answers every (entry, shelf) pair.
+        self._reachable_mask = self._reachable_from(self._coords(self.entry_points))
+        unreachable_shelves = shelf_xy[~self._in_mask(self._reachable_mask, shelf_xy)]
         
-        if unreachable_shelves:
+        if len(unreachable_shelves):
             issues.append(f"Found {len(unreachable_shelves)} unreachable shelves")
         
         # Check if all packing stations are reachable from at least one shelf
-        unreachable_stations = []
-        for station in self.packing_stations:
-            reachable = False
-            for shelf in self.shelves:
-                if self.is_reachable(shelf.position, station):
-                    reachable = True
-                    break
-            
-            if not reachable:
-                unreachable_stations.append(station)
+        from_shelves = self._reachable_from(shelf_xy)
+        unreachable_stations = station_xy[~self._in_mask(from_shelves, station_xy)]
         
-        if unreachable_stations:
+        if len(unreachable_stations):
             issues.append(f"Found {len(unreachable_stations)} unreachable packing stations")
         
-        # Check aisle spacing
-        aisle_violations = []
-        for shelf in self.shelves:
-            if self.is_aisle_position(shelf.position):
-                aisle_violations.append(shelf.position)
+        # Check aisle spacing (same rule as is_aisle_position)
+        aisle_violations = shelf_xy[(shelf_xy[:, 0] % 3 == 2) | (shelf_xy[:, 1] % 3 == 2)]
         
-        if aisle_violations:
+        if len(aisle_violations):
             # Temporarily disable aisle violations for fallback layout
             # issues.append(f"Found {len(aisle_violations)} shelves in aisle positions")
             warnings.append(f"Found {len(aisle_violations)} shelves in aisle positions (ignored for fallback)")
         
         # Check category distribution
-        category_counts = {}
-        for shelf in self.shelves:
-            category_counts[shelf.category] = category_counts.get(shelf.category, 0) + 1
+        category_counts = dict(Counter(shelf.category for shelf in self.shelves))
         
         if len(category_counts) < len(self.categories):
             warnings.append("Not all categories are represented")
@@ -340,30 +540,36 @@ class AdvancedLayoutOptimizer:
             "issues": issues,
             "warnings": warnings,
             "utilization_rate": utilization_rate,
-            "unreachable_shelves": [pos.to_list() for pos in unreachable_shelves],
-            "unreachable_stations": [pos.to_list() for pos in unreachable_stations],
-            "aisle_violations": [pos.to_list() for pos in aisle_violations],
+            "unreachable_shelves": unreachable_shelves.tolist(),
+            "unreachable_stations": unreachable_stations.tolist(),
+            "aisle_violations": aisle_violations.tolist(),
             "category_distribution": category_counts
         }
     
-    def optimize_layout(self, max_attempts: int = 10) -> Dict:
+    def optimize_layout(self, max_attempts: int = 10, target_score: float = 95) -> Dict:
         """
         Optimize the warehouse layout with multiple attempts
         
+        Stops early once a valid layout scores at least target_score, since
+        the quality score tops out at 100 and later attempts rarely beat it.
+        
         Returns:
             Dict with optimization results
         """
         best_layout = None
         best_score = 0
         best_validation = None
+        attempts_made = 0
         
         for attempt in range(max_attempts):
+            attempts_made = attempt + 1
+            
             # Clear current layout
             self.shelves = []
             self.packing_stations = []
             self.drop_zones = []
             self.robots = []
-            self._reachability_cache.clear()
+            self._clear_occupancy()
             
             # Generate new layout
             success = self._generate_layout()
@@ -373,21 +579,22 @@ class AdvancedLayoutOptimizer:
                 validation = self.validate_layout()
                 
                 if validation["valid"] and validation["quality_score"] > best_score:
-                    best_layout = {
-                        "shelves": [shelf.to_dict() for shelf in self.shelves],
-                        "packing_stations": [pos.to_list() for pos in self.packing_stations],
-                        "drop_zones": [pos.to_list() for pos in self.drop_zones],
-                        "robots": [robot.to_dict() for robot in self.robots]
-                    }
+                    # Each attempt starts from fresh lists, so keeping
+                    # references is enough; dicts are built for the winner only
+                    best_layout = (self.shelves, self.packing_stations,
+                                   self.drop_zones, self.robots)
                     best_score = validation["quality_score"]
                     best_validation = validation
+            
+            if best_score >= target_score:
+                break
         
         if best_layout:
             return {
                 "success": True,
-                "layout": best_layout,
+                "layout": self._layout_data(*best_layout),
                 "validation": best_validation,
-                "attempts": max_attempts
+                "attempts": attempts_made
             }
         else:
             return {
@@ -396,6 +603,31 @@ class AdvancedLayoutOptimizer:
                 "attempts": max_attempts
             }
     
+    def _place_shelves(self, positions: List[Position]):
+        """Create shelves at positions, cycling through the categories"""
+        categories = self.categories
+        self.shelves = [Shelf(position=pos, category=categories[i % len(categories)])
+                        for i, pos in enumerate(positions)]
+        for pos in positions:
+            self._mark_occupied(pos)
+    
+    def _place_robots(self):
+        """Create the robots, spread across the entry points"""
+        entries = self.entry_points
+        self.robots = [Robot(id=f"R{i+1}", position=entries[i % len(entries)])
+                       for i in range(self.num_robots)]
+        for robot in self.robots:
+            self._mark_occupied(robot.position)
+    
+    def _layout_data(self, shelves=None, packing_stations=None, drop_zones=None, robots=None) -> Dict:
+        """Serializable layout dict, from the current layout unless lists are given"""
+        return {
+            "shelves": [shelf.to_dict() for shelf in (self.shelves if shelves is None else shelves)],
+            "packing_stations": [pos.to_list() for pos in (self.packing_stations if packing_stations is None else packing_stations)],
+            "drop_zones": [pos.to_list() for pos in (self.drop_zones if drop_zones is None else drop_zones)],
+            "robots": [robot.to_dict() for robot in (self.robots if robots is None else robots)]
+        }
+    
     def _generate_layout(self) -> bool:
         """Generate a single layout attempt with improved path planning"""
         try:
@@ -416,31 +648,28 @@ class AdvancedLayoutOptimizer:
                 selected_stations = random.sample(valid_station_positions, self.num_packing_stations)
             
             self.packing_stations = selected_stations
+            for station in selected_stations:
+                self._mark_occupied(station)
             
             # Step 2: Place shelves in a way that maintains accessibility
-            valid_shelf_positions = self.find_valid_shelf_positions()
-            if len(valid_shelf_positions) < self.num_shelves:
+            candidates = self._shelf_candidates()
+            if len(candidates) < self.num_shelves:
                 return False
             
             # Sort positions by distance from entry points to ensure closer ones are placed first
-            entry_center = Position(0, self.rows // 2)
-            valid_shelf_positions.sort(key=lambda pos: self.get_manhattan_distance(pos, entry_center))
+            # (stable, so ties keep row-major order)
+            distance = np.abs(candidates[:, 0]) + np.abs(candidates[:, 1] - self.rows // 2)
+            order = np.argsort(distance, kind='stable')
             
             # Take the first num_shelves positions
-            selected_positions = valid_shelf_positions[:self.num_shelves]
+            selected_positions = [Position(x, y) for x, y in
+                                  candidates[order[:self.num_shelves]].tolist()]
             
             # Assign categories to shelves
-            for i, pos in enumerate(selected_positions):
-                category = self.categories[i % len(self.categories)]
-                shelf = Shelf(position=pos, category=category)
-                self.shelves.append(shelf)
+            self._place_shelves(selected_positions)
             
             # Step 3: Place robots at entry points
-            for i in range(self.num_robots):
-                robot_id = f"R{i+1}"
-                robot_pos = self.entry_points[i % len(self.entry_points)]
-                robot = Robot(id=robot_id, position=robot_pos)
-                self.robots.append(robot)
+            self._place_robots()
             
             # Step 4: Place drop zones near packing stations
             for station in self.packing_stations:
@@ -454,8 +683,9 @@ class AdvancedLayoutOptimizer:
             
             return True
             
-        except Exception as e:
-            print(f"Layout generation error: {e}")
+        except (LookupError, ValueError, ArithmeticError) as e:
+            # e.g. no entry points to spread robots over
+            logger.debug("Layout generation error: %s", e)
             return False
     
     def export_layout(self, layout_data: Dict) -> str:
@@ -489,6 +719,7 @@ class AdvancedLayoutOptimizer:
         self.packing_stations = []
         self.drop_zones = []
         self.robots = []
+        self._clear_occupancy()
         
         # Create a working layout that meets all requirements:
         # - Proper aisle spacing (1 empty row/column every 2 shelf rows/columns)
@@ -508,45 +739,26 @@ class AdvancedLayoutOptimizer:
         self.entry_points = entry_points
         
         # Create shelf positions with proper aisle spacing
-        # Aisle positions: x%3==2 or y%3==2 (columns 2,5,8,11 and rows 2,5,8,11)
-        # Valid shelf positions: x%3!=2 and y%3!=2
-        shelf_positions = []
-        
-        # Use a simple pattern that respects aisle spacing
-        valid_positions = [
-            (0, 0), (0, 1), (0, 3), (0, 4), (0, 6), (0, 7), (0, 9), (0, 10),  # First row
-            (1, 0), (1, 1), (1, 3), (1, 4), (1, 6), (1, 7), (1, 9), (1, 10),  # Second row
-            (3, 0), (3, 1), (3, 3), (3, 4), (3, 6), (3, 7), (3, 9), (3, 10),  # Third row
-            (4, 0), (4, 1), (4, 3), (4, 4), (4, 6), (4, 7), (4, 9), (4, 10),  # Fourth row
-            (6, 0), (6, 1), (6, 3), (6, 4), (6, 6), (6, 7), (6, 9), (6, 10),  # Fifth row
-            (7, 0), (7, 1), (7, 3), (7, 4), (7, 6), (7, 7), (7, 9), (7, 10),  # Sixth row
-            (9, 0), (9, 1), (9, 3), (9, 4), (9, 6), (9, 7), (9, 9), (9, 10),  # Seventh row
-            (10, 0), (10, 1), (10, 3), (10, 4), (10, 6), (10, 7), (10, 9), (10, 10)  # Eighth row
-        ]
-        
-        for x, y in valid_positions:
-            if x < self.columns and y < self.rows and len(shelf_positions) < self.num_shelves:
-                pos = Position(x, y)
-                shelf_positions.append(pos)
+        if self.columns > 10 and self.rows > 10:
+            # Every fallback position fits, so no filtering is needed
+            shelf_positions = list(_FALLBACK_SHELF_POSITIONS[:self.num_shelves])
+        else:
+            shelf_positions = [pos for pos in _FALLBACK_SHELF_POSITIONS
+                               if pos.x < self.columns and pos.y < self.rows][:self.num_shelves]
         
         # Create shelves with categories
-        for i, pos in enumerate(shelf_positions):
-            category = self.categories[i % len(self.categories)]
-            shelf = Shelf(position=pos, category=category)
-            self.shelves.append(shelf)
+        self._place_shelves(shelf_positions)
         
         # Place packing stations at the edges
         self.packing_stations = [
             Position(2, 0),  # Top, on aisle
             Position(self.columns - 3, 0)  # Top, on aisle
         ]
+        for station in self.packing_stations:
+            self._mark_occupied(station)
         
         # Place robots at entry points
-        for i in range(self.num_robots):
-            robot_id = f"R{i+1}"
-            robot_pos = self.entry_points[i % len(self.entry_points)]
-            robot = Robot(id=robot_id, position=robot_pos)
-            self.robots.append(robot)
+        self._place_robots()
         
         # Place drop zones
         for station in self.packing_stations:
@@ -554,12 +766,9 @@ class AdvancedLayoutOptimizer:
             if self.is_valid_position(drop_pos) and not self.is_position_occupied(drop_pos):
                 self.drop_zones.append(drop_pos)
         
-        layout_data = {
-            "shelves": [shelf.to_dict() for shelf in self.shelves],
-            "packing_stations": [pos.to_list() for pos in self.packing_stations],
-            "drop_zones": [pos.to_list() for pos in self.drop_zones],
-            "robots": [robot.to_dict() for robot in self.robots]
-        }
+        layout_data = self._layout_data()
+        
+        category_counts = Counter(shelf.category for shelf in self.shelves)
         
         # Create a fake validation result that says everything is valid
         fake_validation = {
@@ -571,7 +780,7 @@ class AdvancedLayoutOptimizer:
             "unreachable_shelves": [],
             "unreachable_stations": [],
             "aisle_violations": [],
-            "category_distribution": {cat: len([s for s in self.shelves if s.category == cat]) for cat in self.categories}
+            "category_distribution": {cat: category_counts[cat] for cat in self.categories}
         }
         
         return {
@@ -2,20 +2,318 @@ import sqlite3
 import pandas as pd
 import json
 import os
-from datetime import datetime, timedelta
+import csv
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 import streamlit as st
 import pickle
 import hashlib
+import threading
+import atexit
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Per-connection tuning: fewer fsyncs per commit, temp tables and a 64 MiB
+# page cache in memory, and reads through a 256 MiB memory map
+_CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA wal_autocheckpoint=1000',
+    # INSERT OR REPLACE only fires the row-count delete triggers with this on
+    'PRAGMA recursive_triggers=ON',
+)
+
+# Row counts kept in the row_counts table by triggers, as stats key -> table
+_COUNTED_TABLES = {
+    'total_layouts': 'warehouse_layouts',
+    'total_runs': 'simulation_runs',
+    'total_orders': 'orders',
+    'total_order_items': 'order_items',
+    'total_metrics': 'performance_metrics',
+}
+
+# Bump when the schema changes; init_database only runs the DDL below on
+# databases whose PRAGMA user_version is older
+_SCHEMA_VERSION = 1
+
+_SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS warehouse_layouts (
+        layout_id TEXT PRIMARY KEY,
+        layout_name TEXT NOT NULL,
+        layout_type TEXT NOT NULL,
+        grid_width INTEGER NOT NULL,
+        grid_height INTEGER NOT NULL,
+        layout_data TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    CREATE TABLE IF NOT EXISTS simulation_runs (
+        run_id TEXT PRIMARY KEY,
+        layout_id TEXT NOT NULL,
+        run_name TEXT,
+        start_time TIMESTAMP NOT NULL,
+        end_time TIMESTAMP,
+        duration_seconds REAL,
+        num_pickers INTEGER,
+        num_orders INTEGER,
+        items_per_order INTEGER,
+        simulation_speed TEXT,
+        status TEXT DEFAULT 'running',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (layout_id) REFERENCES warehouse_layouts (layout_id)
+    );
+    
+    CREATE TABLE IF NOT EXISTS orders (
+        order_id TEXT PRIMARY KEY,
+        run_id TEXT NOT NULL,
+        order_timestamp TIMESTAMP NOT NULL,
+        status TEXT DEFAULT 'pending',
+        total_items INTEGER,
+        estimated_pick_time REAL,
+        actual_pick_time REAL,
+        priority INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (run_id) REFERENCES simulation_runs (run_id)
+    );
+    
+    CREATE TABLE IF NOT EXISTS order_items (
+        item_id TEXT PRIMARY KEY,
+        order_id TEXT NOT NULL,
+        priority INTEGER,
+        zone TEXT,
+        shelf_x INTEGER,
+        shelf_y INTEGER,
+        item_type TEXT,
+        quantity INTEGER,
+        FOREIGN KEY (order_id) REFERENCES orders (order_id)
+    );
+    
+    CREATE TABLE IF NOT EXISTS performance_metrics (
+        metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id TEXT NOT NULL,
+        metric_name TEXT NOT NULL,
+        metric_value REAL,
+        metric_unit TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (run_id) REFERENCES simulation_runs (run_id)
+    );
+    
+    -- Row counts for get_database_stats, maintained by triggers so the stats
+    -- don't have to scan every table
+    CREATE TABLE IF NOT EXISTS row_counts (
+        table_name TEXT PRIMARY KEY,
+        row_count INTEGER NOT NULL
+    );
+''' + ''.join(f'''
+    CREATE TRIGGER IF NOT EXISTS count_{table}_insert AFTER INSERT ON {table}
+    BEGIN
+        UPDATE row_counts SET row_count = row_count + 1 WHERE table_name = '{table}';
+    END;
+    CREATE TRIGGER IF NOT EXISTS count_{table}_delete AFTER DELETE ON {table}
+    BEGIN
+        UPDATE row_counts SET row_count = row_count - 1 WHERE table_name = '{table}';
+    END;
+''' for table in _COUNTED_TABLES.values()) + '''
+    CREATE INDEX IF NOT EXISTS idx_orders_run_id ON orders (run_id);
+    CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id);
+    CREATE INDEX IF NOT EXISTS idx_metrics_run_name ON performance_metrics (run_id, metric_name);
+    CREATE INDEX IF NOT EXISTS idx_runs_layout_id ON simulation_runs (layout_id);
+    -- Lets the recent-runs listing walk the index instead of sorting the table
+    CREATE INDEX IF NOT EXISTS idx_runs_start_time ON simulation_runs (start_time DESC);
+    
+    -- No query filters or sorts on order_timestamp alone, and run_id lookups
+    -- on metrics are served by idx_metrics_run_name
+    DROP INDEX IF EXISTS idx_orders_timestamp;
+    DROP INDEX IF EXISTS idx_metrics_run_id;
+'''
+
+# Databases from before order_items kept items in orders as status = 'item'
+# rows with ids of the form <order_id>_item_<n>; this moves them across
+_SQL_MIGRATE_ORDER_ITEMS = '''
+    INSERT OR REPLACE INTO order_items 
+    (item_id, order_id, priority, zone, shelf_x, shelf_y, item_type, quantity)
+    SELECT order_id, substr(order_id, 1, instr(order_id, '_item_') - 1),
+           priority, zone, shelf_x, shelf_y, item_type, quantity
+    FROM orders WHERE status = 'item';
+    DELETE FROM orders WHERE status = 'item';
+'''
+
+# Recount every tracked table, for databases the triggers haven't covered yet
+_SQL_SEED_ROW_COUNTS = ''.join(f'''
+    INSERT OR REPLACE INTO row_counts VALUES ('{table}', (SELECT COUNT(*) FROM {table}));'''
+    for table in _COUNTED_TABLES.values())
+
+# Buffered order and metric rows are written once this many have accumulated
+_WRITE_BUFFER_ROWS = 500
+
+# Statements are kept as constants so each call reuses the same SQL text
+# and hits the connection's prepared statement cache
+_SQL_SELECT_LAYOUT_ID = 'SELECT layout_id FROM warehouse_layouts WHERE layout_id = ?'
+
+_SQL_UPDATE_LAYOUT = '''
+    UPDATE warehouse_layouts 
+    SET layout_name = ?, layout_type = ?, grid_width = ?, grid_height = ?, 
+        layout_data = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE layout_id = ?
+'''
+
+_SQL_INSERT_LAYOUT = '''
+    INSERT INTO warehouse_layouts 
+    (layout_id, layout_name, layout_type, grid_width, grid_height, layout_data)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_INSERT_RUN = '''
+    INSERT INTO simulation_runs 
+    (run_id, layout_id, run_name, start_time, num_pickers, num_orders, items_per_order, simulation_speed)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_SELECT_RUN_START = 'SELECT start_time FROM simulation_runs WHERE run_id = ?'
+
+_SQL_END_RUN = '''
+    UPDATE simulation_runs 
+    SET end_time = ?, duration_seconds = ?, status = 'completed'
+    WHERE run_id = ?
+'''
+
+_SQL_INSERT_ORDER = '''
+    INSERT OR REPLACE INTO orders 
+    (order_id, run_id, order_timestamp, status, total_items, estimated_pick_time, priority)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_INSERT_ORDER_ITEM = '''
+    INSERT OR REPLACE INTO order_items 
+    (item_id, order_id, priority, zone, shelf_x, shelf_y, item_type, quantity)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# One row per item, with the order header repeated; orders without items
+# still appear once
+_SQL_RUN_ORDERS = '''
+    SELECT o.order_id, o.run_id, o.order_timestamp, o.status, o.total_items,
+           o.estimated_pick_time, o.actual_pick_time, o.priority,
+           i.item_id, i.priority AS item_priority, i.zone, i.shelf_x, i.shelf_y,
+           i.item_type, i.quantity, o.created_at
+    FROM orders o
+    LEFT JOIN order_items i ON i.order_id = o.order_id
+    WHERE o.run_id = ? 
+    ORDER BY o.order_timestamp, o.order_id, i.rowid
+'''
+
+_SQL_RUN_METRICS = '''
+    SELECT metric_name, metric_value, metric_unit, timestamp
+    FROM performance_metrics 
+    WHERE run_id = ? 
+    ORDER BY timestamp, metric_id
+'''
+
+_SQL_RECENT_RUNS = '''
+    SELECT r.run_id, r.run_name, r.start_time, r.end_time, r.duration_seconds,
+           r.num_pickers, r.num_orders, r.status, l.layout_name
+    FROM simulation_runs r
+    LEFT JOIN warehouse_layouts l ON r.layout_id = l.layout_id
+    ORDER BY r.start_time DESC
+    LIMIT ?
+'''
+
+_SQL_LAYOUT_SUMMARY = '''
+    SELECT l.layout_id, l.layout_name, l.layout_type, l.grid_width, l.grid_height,
+           l.created_at, l.updated_at,
+           COUNT(r.run_id) as num_runs
+    FROM warehouse_layouts l
+    LEFT JOIN simulation_runs r ON l.layout_id = r.layout_id
+    GROUP BY l.layout_id
+    ORDER BY l.created_at DESC
+'''
+
+# Bulk variants of the order inserts: the rows arrive as a JSON array of
+# arrays and are unpacked with json_each, in the same column order
+_SQL_INSERT_ORDERS_JSON = '''
+    INSERT OR REPLACE INTO orders 
+    (order_id, run_id, order_timestamp, status, total_items, estimated_pick_time, priority)
+    SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'), json_extract(value, '$[2]'),
+           json_extract(value, '$[3]'), json_extract(value, '$[4]'), json_extract(value, '$[5]'),
+           json_extract(value, '$[6]')
+    FROM json_each(?)
+'''
+
+_SQL_INSERT_ORDER_ITEMS_JSON = '''
+    INSERT OR REPLACE INTO order_items 
+    (item_id, order_id, priority, zone, shelf_x, shelf_y, item_type, quantity)
+    SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'), json_extract(value, '$[2]'),
+           json_extract(value, '$[3]'), json_extract(value, '$[4]'), json_extract(value, '$[5]'),
+           json_extract(value, '$[6]'), json_extract(value, '$[7]')
+    FROM json_each(?)
+'''
+
+_SQL_INSERT_METRIC = '''
+    INSERT INTO performance_metrics (run_id, metric_name, metric_value, metric_unit)
+    VALUES (?, ?, ?, ?)
+'''
+
+# Buffered metrics carry the time they were recorded rather than the time they are flushed
+_SQL_INSERT_METRIC_AT = '''
+    INSERT INTO performance_metrics (run_id, metric_name, metric_value, metric_unit, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+def _dump_layout(layout_data: Dict) -> str:
+    """Serialize layout data for the layout_data column, with orjson when it's installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(layout_data).decode()
+        except TypeError:
+            # e.g. non-string keys, which json.dumps coerces and orjson rejects
+            pass
+    return json.dumps(layout_data)
+
+def _log_auto_save_failure(future):
+    """Report an auto-save that raised on the background worker"""
+    if future.exception() is not None:
+        logger.error("Auto-save failed", exc_info=future.exception())
 
 class WarehouseDataPersistence:
     """SQLite and Pandas-based data persistence for warehouse simulation"""
     
     def __init__(self, db_path: str = "warehouse_data.db"):
         self.db_path = db_path
+        # One connection per thread, opened on first use and kept for reuse
+        self._local = threading.local()
+        # Order and metric rows waiting to be written, as (statement, rows) runs
+        # in the order they were saved
+        self._write_buffer = []
+        self._buffered_rows = 0
+        self._buffer_lock = threading.RLock()
+        # Auto-save CSVs are written on this worker, which gets its own connection
+        self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='persistence-io')
         self.init_database()
-        
-        # Initialize session state for data tracking
+        atexit.register(self.flush)
+        # Registered last so it runs first at exit: pending auto-saves finish before the final flush
+        atexit.register(self._io_executor.shutdown, wait=True)
+        self.init_session_state()
+    
+    def init_session_state(self):
+        """Initialize session state for data tracking"""
         if 'simulation_runs' not in st.session_state:
             st.session_state.simulation_runs = []
         if 'current_run_id' not in st.session_state:
@@ -23,176 +321,166 @@ class WarehouseDataPersistence:
         if 'auto_save_enabled' not in st.session_state:
             st.session_state.auto_save_enabled = True
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with WAL journaling and the tuned PRAGMAs applied"""
+        # Autocommit mode: transactions are opened explicitly by _transaction()
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                               cached_statements=512)
+        # WAL lets readers run alongside a writer; it doesn't apply in memory
+        if self.db_path != ':memory:':
+            conn.execute('PRAGMA journal_mode=WAL')
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Long-lived connection for the calling thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+    
+    @contextmanager
+    def _transaction(self):
+        """Run a block of writes as a single transaction on the thread's connection"""
+        conn = self._connection()
+        conn.execute('BEGIN')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    
+    def _buffer_rows(self, sql: str, rows: List[tuple]):
+        """Queue rows for a write statement and flush once enough have built up"""
+        with self._buffer_lock:
+            if self._write_buffer and self._write_buffer[-1][0] == sql:
+                self._write_buffer[-1][1].extend(rows)
+            else:
+                self._write_buffer.append((sql, list(rows)))
+            self._buffered_rows += len(rows)
+            if self._buffered_rows >= _WRITE_BUFFER_ROWS:
+                self.flush()
+    
+    def _drain_buffer(self, conn: sqlite3.Connection):
+        """Write the buffered rows on conn; the caller holds the buffer lock and a transaction"""
+        for sql, rows in self._write_buffer:
+            conn.executemany(sql, rows)
+        self._write_buffer = []
+        self._buffered_rows = 0
+    
+    def flush(self):
+        """Write any buffered order and metric rows in one transaction"""
+        with self._buffer_lock:
+            if self._write_buffer:
+                with self._transaction() as conn:
+                    self._drain_buffer(conn)
+    
+    def close(self):
+        """Close the calling thread's connection; the next call reopens it"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
     def init_database(self):
         """Initialize SQLite database with required tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create warehouse layouts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS warehouse_layouts (
-                layout_id TEXT PRIMARY KEY,
-                layout_name TEXT NOT NULL,
-                layout_type TEXT NOT NULL,
-                grid_width INTEGER NOT NULL,
-                grid_height INTEGER NOT NULL,
-                layout_data TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create simulation runs table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS simulation_runs (
-                run_id TEXT PRIMARY KEY,
-                layout_id TEXT NOT NULL,
-                run_name TEXT,
-                start_time TIMESTAMP NOT NULL,
-                end_time TIMESTAMP,
-                duration_seconds REAL,
-                num_pickers INTEGER,
-                num_orders INTEGER,
-                items_per_order INTEGER,
-                simulation_speed TEXT,
-                status TEXT DEFAULT 'running',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (layout_id) REFERENCES warehouse_layouts (layout_id)
-            )
-        ''')
-        
-        # Create orders table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS orders (
-                order_id TEXT PRIMARY KEY,
-                run_id TEXT NOT NULL,
-                order_timestamp TIMESTAMP NOT NULL,
-                status TEXT DEFAULT 'pending',
-                total_items INTEGER,
-                estimated_pick_time REAL,
-                actual_pick_time REAL,
-                priority INTEGER,
-                zone TEXT,
-                shelf_x INTEGER,
-                shelf_y INTEGER,
-                item_type TEXT,
-                quantity INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (run_id) REFERENCES simulation_runs (run_id)
-            )
-        ''')
-        
-        # Create performance metrics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS performance_metrics (
-                metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                run_id TEXT NOT NULL,
-                metric_name TEXT NOT NULL,
-                metric_value REAL,
-                metric_unit TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (run_id) REFERENCES simulation_runs (run_id)
-            )
-        ''')
-        
-        # Create indexes for better performance
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_run_id ON orders (run_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_timestamp ON orders (order_timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_run_id ON performance_metrics (run_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_runs_layout_id ON simulation_runs (layout_id)')
-        
-        conn.commit()
-        conn.close()
+        conn = self._connection()
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= _SCHEMA_VERSION:
+            # Schema is current; just let SQLite refresh planner statistics if needed
+            conn.execute('PRAGMA optimize')
+            return
+        
+        # Databases that still keep items in orders have its item-only columns
+        order_columns = {row[1] for row in conn.execute('PRAGMA table_info(orders)')}
+        script = [
+            'BEGIN;',
+            _SCHEMA_SQL,
+            _SQL_MIGRATE_ORDER_ITEMS if 'zone' in order_columns else '',
+            _SQL_SEED_ROW_COUNTS,
+            f'PRAGMA user_version = {_SCHEMA_VERSION};',
+            'ANALYZE;',
+            'COMMIT;',
+        ]
+        try:
+            conn.executescript('\n'.join(script))
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
     
-    def generate_run_id(self, layout_id: str) -> str:
+    def generate_run_id(self, layout_id: str, now: Optional[datetime] = None) -> str:
         """Generate unique run ID based on layout and timestamp"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = (now or datetime.now()).strftime("%Y%m%d_%H%M%S")
         return f"run_{layout_id}_{timestamp}"
     
     def save_warehouse_layout(self, layout_data: Dict) -> str:
         """Save warehouse layout to database"""
         layout_id = self.generate_layout_id(layout_data)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Check if layout already exists
-        cursor.execute('SELECT layout_id FROM warehouse_layouts WHERE layout_id = ?', (layout_id,))
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update existing layout
-            cursor.execute('''
-                UPDATE warehouse_layouts 
-                SET layout_name = ?, layout_type = ?, grid_width = ?, grid_height = ?, 
-                    layout_data = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE layout_id = ?
-            ''', (
-                layout_data.get('layout_name', 'Unknown'),
-                layout_data.get('layout_type', 'Custom'),
-                layout_data.get('grid_width', 12),
-                layout_data.get('grid_height', 10),
-                json.dumps(layout_data),
-                layout_id
-            ))
-        else:
-            # Insert new layout
-            cursor.execute('''
-                INSERT INTO warehouse_layouts 
-                (layout_id, layout_name, layout_type, grid_width, grid_height, layout_data)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                layout_id,
-                layout_data.get('layout_name', 'Unknown'),
-                layout_data.get('layout_type', 'Custom'),
-                layout_data.get('grid_width', 12),
-                layout_data.get('grid_height', 10),
-                json.dumps(layout_data)
-            ))
-        
-        conn.commit()
-        conn.close()
+        payload = _dump_layout(layout_data)
+        
+        with self._transaction() as conn:
+            # Check if layout already exists
+            existing = conn.execute(_SQL_SELECT_LAYOUT_ID, (layout_id,)).fetchone()
+            
+            if existing:
+                # Update existing layout
+                conn.execute(_SQL_UPDATE_LAYOUT, (
+                    layout_data.get('layout_name', 'Unknown'),
+                    layout_data.get('layout_type', 'Custom'),
+                    layout_data.get('grid_width', 12),
+                    layout_data.get('grid_height', 10),
+                    payload,
+                    layout_id
+                ))
+            else:
+                # Insert new layout
+                conn.execute(_SQL_INSERT_LAYOUT, (
+                    layout_id,
+                    layout_data.get('layout_name', 'Unknown'),
+                    layout_data.get('layout_type', 'Custom'),
+                    layout_data.get('grid_width', 12),
+                    layout_data.get('grid_height', 10),
+                    payload
+                ))
         
         return layout_id
     
     def generate_layout_id(self, layout_data: Dict) -> str:
         """Generate unique layout ID based on layout content"""
-        # Create a hash of the layout data for consistent ID generation
-        layout_hash = hashlib.md5(json.dumps(layout_data, sort_keys=True).encode()).hexdigest()[:8]
+        # Create a hash of the layout data for consistent ID generation. The ID is
+        # the stored primary key, so the digest and canonical JSON form must not
+        # change; MD5 is only an identifier here, not a security primitive
+        payload = json.dumps(layout_data, sort_keys=True).encode()
+        layout_hash = hashlib.md5(payload, usedforsecurity=False).hexdigest()[:8]
         layout_type = layout_data.get('layout_type', 'custom')
         return f"{layout_type}_{layout_hash}"
     
     def start_simulation_run(self, layout_id: str, run_config: Dict) -> str:
         """Start a new simulation run and return run ID"""
-        run_id = self.generate_run_id(layout_id)
+        now = datetime.now()
+        run_id = self.generate_run_id(layout_id, now)
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO simulation_runs 
-            (run_id, layout_id, run_name, start_time, num_pickers, num_orders, items_per_order, simulation_speed)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            run_id,
-            layout_id,
-            run_config.get('run_name', f'Simulation {datetime.now().strftime("%Y-%m-%d %H:%M")}'),
-            datetime.now(),
-            run_config.get('num_pickers', 3),
-            run_config.get('num_orders', 50),
-            run_config.get('items_per_order', 3),
-            run_config.get('simulation_speed', 'Normal')
-        ))
-        
-        conn.commit()
-        conn.close()
+        with self._transaction() as conn:
+            conn.execute(_SQL_INSERT_RUN, (
+                run_id,
+                layout_id,
+                run_config.get('run_name', f'Simulation {now.strftime("%Y-%m-%d %H:%M")}'),
+                now,
+                run_config.get('num_pickers', 3),
+                run_config.get('num_orders', 50),
+                run_config.get('items_per_order', 3),
+                run_config.get('simulation_speed', 'Normal')
+            ))
         
         # Update session state
         st.session_state.current_run_id = run_id
         st.session_state.simulation_runs.append({
             'run_id': run_id,
             'layout_id': layout_id,
-            'start_time': datetime.now(),
+            'start_time': now,
             'config': run_config
         })
         
@@ -200,163 +488,129 @@ class WarehouseDataPersistence:
     
     def end_simulation_run(self, run_id: str, final_metrics: Dict):
         """End a simulation run and save final metrics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        end_time = datetime.now()
-        
-        # Update run end time and duration
-        cursor.execute('''
-            UPDATE simulation_runs 
-            SET end_time = ?, duration_seconds = ?, status = 'completed'
-            WHERE run_id = ?
-        ''', (end_time, (end_time - datetime.now()).total_seconds(), run_id))
-        
-        # Save final performance metrics
-        for metric_name, metric_data in final_metrics.items():
-            cursor.execute('''
-                INSERT INTO performance_metrics (run_id, metric_name, metric_value, metric_unit)
-                VALUES (?, ?, ?, ?)
-            ''', (
-                run_id,
-                metric_name,
-                metric_data.get('value', 0),
-                metric_data.get('unit', '')
-            ))
-        
-        conn.commit()
-        conn.close()
-        
-        # Auto-save to file if enabled
+        with self._buffer_lock, self._transaction() as conn:
+            # Rows buffered during the run are written together with its end
+            self._drain_buffer(conn)
+            
+            end_time = datetime.now()
+            
+            # Update run end time and duration, measured from the stored start time
+            row = conn.execute(_SQL_SELECT_RUN_START, (run_id,)).fetchone()
+            duration = None
+            if row and row[0]:
+                duration = (end_time - datetime.fromisoformat(row[0])).total_seconds()
+            conn.execute(_SQL_END_RUN, (end_time, duration, run_id))
+            
+            # Save final performance metrics in one batch
+            conn.executemany(_SQL_INSERT_METRIC, [
+                (
+                    run_id,
+                    metric_name,
+                    metric_data.get('value', 0),
+                    metric_data.get('unit', '')
+                )
+                for metric_name, metric_data in final_metrics.items()
+            ])
+        
+        # Auto-save to file if enabled, in the background so the UI isn't held up
         if st.session_state.auto_save_enabled:
-            self.auto_save_run_data(run_id)
+            future = self._io_executor.submit(self.auto_save_run_data, run_id)
+            future.add_done_callback(_log_auto_save_failure)
     
-    def save_order(self, run_id: str, order_data: Dict):
-        """Save individual order to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Save main order
-        cursor.execute('''
-            INSERT OR REPLACE INTO orders 
-            (order_id, run_id, order_timestamp, status, total_items, estimated_pick_time, priority)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            order_data.get('order_id', ''),
+    def _order_rows(self, run_id: str, order_data: Dict, now: datetime):
+        """Parameter rows for an order header and its items; now stands in for a missing timestamp"""
+        order_id = order_data.get('order_id', '')
+        header = (
+            order_id,
             run_id,
-            order_data.get('timestamp', datetime.now()),
+            order_data['timestamp'] if 'timestamp' in order_data else now,
             order_data.get('status', 'pending'),
             order_data.get('total_items', 0),
             order_data.get('estimated_pick_time', 0),
             order_data.get('priority', 1)
-        ))
-        
-        # Save individual items with unique IDs
-        for i, item in enumerate(order_data.get('items', [])):
-            item_id = f"{order_data.get('order_id', '')}_item_{i}"
-            cursor.execute('''
-                INSERT OR REPLACE INTO orders 
-                (order_id, run_id, order_timestamp, status, total_items, estimated_pick_time, 
-                 priority, zone, shelf_x, shelf_y, item_type, quantity)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                item_id,
-                run_id,
-                order_data.get('timestamp', datetime.now()),
-                'item',
-                1,
-                order_data.get('estimated_pick_time', 0),
+        )
+        items = [
+            (
+                f"{order_id}_item_{i}",
+                order_id,
                 item.get('priority', 1),
                 item.get('zone', ''),
                 item.get('shelf_x', item.get('shelf_location_x', 0)),
                 item.get('shelf_y', item.get('shelf_location_y', 0)),
                 item.get('item_type', ''),
                 item.get('quantity', 1)
-            ))
-        
-        conn.commit()
-        conn.close()
+            )
+            for i, item in enumerate(order_data.get('items', []))
+        ]
+        return header, items
+    
+    def save_order(self, run_id: str, order_data: Dict):
+        """Save individual order to database"""
+        header, items = self._order_rows(run_id, order_data, datetime.now())
+        # Save main order, then its items with unique IDs; both are buffered
+        # and written in batches by flush()
+        with self._buffer_lock:
+            self._buffer_rows(_SQL_INSERT_ORDER, [header])
+            self._buffer_rows(_SQL_INSERT_ORDER_ITEM, items)
+    
+    def save_orders_bulk(self, run_id: str, orders: List[Dict]):
+        """Save a batch of orders and their items in a single transaction"""
+        now = datetime.now()
+        headers, items = [], []
+        for order_data in orders:
+            header, order_items = self._order_rows(run_id, order_data, now)
+            headers.append(header)
+            items.extend(order_items)
+        
+        with self._buffer_lock, self._transaction() as conn:
+            # Earlier buffered rows go first so replacements keep their order
+            self._drain_buffer(conn)
+            try:
+                # Ship each table's rows as one JSON array and unpack it in SQLite
+                conn.execute(_SQL_INSERT_ORDERS_JSON, (json.dumps(headers, default=str),))
+                conn.execute(_SQL_INSERT_ORDER_ITEMS_JSON, (json.dumps(items, default=str),))
+            except sqlite3.OperationalError:
+                # SQLite built without the JSON functions; nothing was written yet
+                conn.executemany(_SQL_INSERT_ORDER, headers)
+                conn.executemany(_SQL_INSERT_ORDER_ITEM, items)
     
     def save_performance_metric(self, run_id: str, metric_name: str, value: float, unit: str = ''):
         """Save performance metric to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO performance_metrics (run_id, metric_name, metric_value, metric_unit)
-            VALUES (?, ?, ?, ?)
-        ''', (run_id, metric_name, value, unit))
-        
-        conn.commit()
-        conn.close()
+        # Same format as SQLite's CURRENT_TIMESTAMP, the column default
+        recorded_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self._buffer_rows(_SQL_INSERT_METRIC_AT, [(run_id, metric_name, value, unit, recorded_at)])
     
     def get_simulation_runs(self, limit: int = 50) -> List[Dict]:
         """Get recent simulation runs"""
-        conn = sqlite3.connect(self.db_path)
-        
-        query = '''
-            SELECT r.run_id, r.run_name, r.start_time, r.end_time, r.duration_seconds,
-                   r.num_pickers, r.num_orders, r.status, l.layout_name
-            FROM simulation_runs r
-            LEFT JOIN warehouse_layouts l ON r.layout_id = l.layout_id
-            ORDER BY r.start_time DESC
-            LIMIT ?
-        '''
-        
-        df = pd.read_sql_query(query, conn, params=[limit])
-        conn.close()
-        
-        return df.to_dict('records')
+        return self._fetch_records(_SQL_RECENT_RUNS, (limit,))
+    
+    def _fetch_records(self, query: str, params: tuple = ()) -> List[Dict]:
+        """Run a read query and return its rows as dicts keyed by column name"""
+        cursor = self._connection().cursor()
+        cursor.row_factory = sqlite3.Row
+        return [dict(row) for row in cursor.execute(query, params)]
     
     def get_run_orders(self, run_id: str) -> pd.DataFrame:
         """Get all orders for a specific run"""
-        conn = sqlite3.connect(self.db_path)
+        self.flush()
+        conn = self._connection()
         
-        query = '''
-            SELECT * FROM orders 
-            WHERE run_id = ? 
-            ORDER BY order_timestamp
-        '''
-        
-        df = pd.read_sql_query(query, conn, params=[run_id])
-        conn.close()
+        df = pd.read_sql_query(_SQL_RUN_ORDERS, conn, params=[run_id])
         
         return df
     
     def get_run_metrics(self, run_id: str) -> pd.DataFrame:
         """Get performance metrics for a specific run"""
-        conn = sqlite3.connect(self.db_path)
-        
-        query = '''
-            SELECT metric_name, metric_value, metric_unit, timestamp
-            FROM performance_metrics 
-            WHERE run_id = ? 
-            ORDER BY timestamp
-        '''
+        self.flush()
+        conn = self._connection()
         
-        df = pd.read_sql_query(query, conn, params=[run_id])
-        conn.close()
+        df = pd.read_sql_query(_SQL_RUN_METRICS, conn, params=[run_id])
         
         return df
     
-    def get_layout_summary(self) -> pd.DataFrame:
+    def get_layout_summary(self) -> List[Dict]:
         """Get summary of all layouts"""
-        conn = sqlite3.connect(self.db_path)
-        
-        query = '''
-            SELECT l.layout_id, l.layout_name, l.layout_type, l.grid_width, l.grid_height,
-                   l.created_at, l.updated_at,
-                   COUNT(r.run_id) as num_runs
-            FROM warehouse_layouts l
-            LEFT JOIN simulation_runs r ON l.layout_id = r.layout_id
-            GROUP BY l.layout_id
-            ORDER BY l.created_at DESC
-        '''
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        return df
+        return self._fetch_records(_SQL_LAYOUT_SUMMARY)
     
     def auto_save_run_data(self, run_id: str):
         """Auto-save run data to CSV files"""
@@ -367,32 +621,57 @@ class WarehouseDataPersistence:
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
         
+        # Each file is streamed from the query and only written if it has rows
+        self.flush()
+        
         # Save orders
-        orders_df = self.get_run_orders(run_id)
-        if not orders_df.empty:
-            orders_file = f"{data_dir}/orders_{run_id}_{timestamp}.csv"
-            orders_df.to_csv(orders_file, index=False)
+        orders_file = f"{data_dir}/orders_{run_id}_{timestamp}.csv"
+        self._export_query_csv(_SQL_RUN_ORDERS, orders_file, (run_id,), skip_empty=True)
         
         # Save metrics
-        metrics_df = self.get_run_metrics(run_id)
-        if not metrics_df.empty:
-            metrics_file = f"{data_dir}/metrics_{run_id}_{timestamp}.csv"
-            metrics_df.to_csv(metrics_file, index=False)
+        metrics_file = f"{data_dir}/metrics_{run_id}_{timestamp}.csv"
+        self._export_query_csv(_SQL_RUN_METRICS, metrics_file, (run_id,), skip_empty=True)
         
         # Save run summary
-        conn = sqlite3.connect(self.db_path)
-        run_summary = pd.read_sql_query(
-            'SELECT * FROM simulation_runs WHERE run_id = ?', 
-            conn, params=[run_id]
-        )
-        conn.close()
-        
-        if not run_summary.empty:
-            summary_file = f"{data_dir}/summary_{run_id}_{timestamp}.csv"
-            run_summary.to_csv(summary_file, index=False)
+        summary_file = f"{data_dir}/summary_{run_id}_{timestamp}.csv"
+        self._export_query_csv('SELECT * FROM simulation_runs WHERE run_id = ?', summary_file, (run_id,),
+                               skip_empty=True)
+    
+    def _export_query_csv(self, query: str, path: str, params: tuple = (), skip_empty: bool = False) -> bool:
+        """Stream a query's result to a CSV file; with skip_empty, no file is written for no rows"""
+        cursor = self._connection().execute(query, params)
+        first = cursor.fetchone()
+        if first is None and skip_empty:
+            return False
+        with open(path, 'w', newline='', buffering=1 << 20) as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow([column[0] for column in cursor.description])
+            if first is not None:
+                writer.writerow(first)
+            writer.writerows(cursor)
+        return True
+    
+    def _export_query_parquet(self, query: str, path: str, params: tuple = ()):
+        """Write a query's result to a Parquet file, building the Arrow columns directly"""
+        cursor = self._connection().execute(query, params)
+        names = [column[0] for column in cursor.description]
+        columns = list(zip(*cursor.fetchall())) or [()] * len(names)
+        table = pa.table({name: pa.array(column) for name, column in zip(names, columns)})
+        pq.write_table(table, path)
+    
+    def _export_query(self, query: str, path: str, format: str, params: tuple = ()):
+        """Write a query's result to path in the given export format"""
+        if format == 'parquet':
+            self._export_query_parquet(query, path, params)
+        else:
+            self._export_query_csv(query, path, params)
     
     def export_all_data(self, format: str = 'csv') -> Dict[str, str]:
-        """Export all data to files"""
+        """Export all data to files; format is 'csv' or, with pyarrow installed, 'parquet'"""
+        self.flush()
+        if format == 'parquet' and pq is None:
+            # Parquet needs pyarrow; fall back to CSV rather than failing the export
+            format = 'csv'
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         export_dir = f"data_export_{timestamp}"
         
@@ -402,61 +681,37 @@ class WarehouseDataPersistence:
         exported_files = {}
         
         # Export layouts
-        layouts_df = self.get_layout_summary()
         layouts_file = f"{export_dir}/warehouse_layouts.{format}"
-        layouts_df.to_csv(layouts_file, index=False)
+        self._export_query(_SQL_LAYOUT_SUMMARY, layouts_file, format)
         exported_files['layouts'] = layouts_file
         
         # Export simulation runs
-        runs_df = pd.DataFrame(self.get_simulation_runs(1000))
         runs_file = f"{export_dir}/simulation_runs.{format}"
-        runs_df.to_csv(runs_file, index=False)
+        self._export_query(_SQL_RECENT_RUNS, runs_file, format, (1000,))
         exported_files['runs'] = runs_file
         
-        # Export all orders
-        conn = sqlite3.connect(self.db_path)
-        orders_df = pd.read_sql_query('SELECT * FROM orders ORDER BY created_at DESC', conn)
-        conn.close()
-        
+        # Export all orders, order items and metrics, streamed straight from the
+        # cursor since these tables grow with every run
         orders_file = f"{export_dir}/all_orders.{format}"
-        orders_df.to_csv(orders_file, index=False)
+        self._export_query('SELECT * FROM orders ORDER BY created_at DESC', orders_file, format)
         exported_files['orders'] = orders_file
         
-        # Export all metrics
-        conn = sqlite3.connect(self.db_path)
-        metrics_df = pd.read_sql_query('SELECT * FROM performance_metrics ORDER BY timestamp DESC', conn)
-        conn.close()
+        items_file = f"{export_dir}/all_order_items.{format}"
+        self._export_query('SELECT * FROM order_items ORDER BY rowid DESC', items_file, format)
+        exported_files['order_items'] = items_file
         
         metrics_file = f"{export_dir}/all_metrics.{format}"
-        metrics_df.to_csv(metrics_file, index=False)
+        self._export_query('SELECT * FROM performance_metrics ORDER BY timestamp DESC', metrics_file, format)
         exported_files['metrics'] = metrics_file
         
         return exported_files
     
     def get_database_stats(self) -> Dict[str, int]:
         """Get database statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        stats = {}
-        
-        # Count layouts
-        cursor.execute('SELECT COUNT(*) FROM warehouse_layouts')
-        stats['total_layouts'] = cursor.fetchone()[0]
-        
-        # Count simulation runs
-        cursor.execute('SELECT COUNT(*) FROM simulation_runs')
-        stats['total_runs'] = cursor.fetchone()[0]
-        
-        # Count orders
-        cursor.execute('SELECT COUNT(*) FROM orders')
-        stats['total_orders'] = cursor.fetchone()[0]
-        
-        # Count metrics
-        cursor.execute('SELECT COUNT(*) FROM performance_metrics')
-        stats['total_metrics'] = cursor.fetchone()[0]
-        
-        conn.close()
+        self.flush()
+        conn = self._connection()
+        counts = dict(conn.execute('SELECT table_name, row_count FROM row_counts'))
+        stats = {key: counts.get(table, 0) for key, table in _COUNTED_TABLES.items()}
         
         return stats
 
@@ -464,8 +719,7 @@ def data_persistence_ui():
     """Streamlit UI for data persistence management"""
     st.markdown("### Data Persistence Management")
     
-    # Initialize persistence
-    persistence = WarehouseDataPersistence()
+    persistence = get_persistence()
     
     # Auto-save toggle
     col1, col2 = st.columns(2)
@@ -514,14 +768,23 @@ def data_persistence_ui():
     st.markdown("---")
     st.markdown("#### 🏗️ Warehouse Layouts")
     
-    layouts_df = persistence.get_layout_summary()
-    if not layouts_df.empty:
+    layouts = persistence.get_layout_summary()
+    if layouts:
+        layouts_df = pd.DataFrame(layouts)
         st.dataframe(layouts_df, use_container_width=True)
     else:
         st.info("📭 No layouts found")
 
-# Global persistence instance
-persistence = WarehouseDataPersistence()
+@st.cache_resource
+def _shared_persistence(db_path: str) -> WarehouseDataPersistence:
+    """Persistence object for db_path, constructed once per server process"""
+    return WarehouseDataPersistence(db_path)
+
+def get_persistence(db_path: str = "warehouse_data.db") -> WarehouseDataPersistence:
+    """Shared persistence object, with this session's tracking state initialized"""
+    persistence = _shared_persistence(db_path)
+    persistence.init_session_state()
+    return persistence
 
 def save_current_layout():
     """Save current layout from session state"""
@@ -537,7 +800,7 @@ def save_current_layout():
             'entry_exit': st.session_state.custom_layout_state.get('entry_exit', None)
         }
         
-        layout_id = persistence.save_warehouse_layout(layout_data)
+        layout_id = get_persistence().save_warehouse_layout(layout_data)
         st.success(f"✅ Layout saved with ID: {layout_id}")
         return layout_id
     
@@ -555,7 +818,7 @@ def start_new_simulation():
             'simulation_speed': st.session_state.get('simulation_speed', 'Normal')
         }
         
-        run_id = persistence.start_simulation_run(layout_id, run_config)
+        run_id = get_persistence().start_simulation_run(layout_id, run_config)
         st.success(f"✅ Simulation started with run ID: {run_id}")
         return run_id
     
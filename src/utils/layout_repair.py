@@ -1,7 +1,119 @@
 import numpy as np
 import random
+from collections import OrderedDict, deque
 from .layout_validator import LayoutValidator
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+def _scan_candidates_kernel(occ, w, h, ex, ey, xs, ys):
+    """
+    For each candidate (xs[i], ys[i]), mark it occupied in occ[y, x] and
+    search for it from the entry (ex, ey), returning a uint8 mask of the
+    candidates that were reached. occ is restored before returning.
+    
+    A candidate counts as reached once the search gets next to it, the way
+    LayoutValidator.validate_reachability treats shelves; otherwise moves
+    follow LayoutValidator.a_star: 4-connected, never entering an occupied
+    cell. Only reachability matters here, so this is a BFS that stops at
+    the goal rather than an A* that keeps paths.
+    """
+    n = w * h
+    found = np.zeros(len(xs), dtype=np.uint8)
+    # Cells seen in search i are stamped i + 1, so nothing is cleared between searches
+    seen = np.zeros(n, dtype=np.int32)
+    queue = np.empty(n, dtype=np.int32)
+    start = ey * w + ex
+    for i in range(len(xs)):
+        goal = ys[i] * w + xs[i]
+        if goal == start:
+            found[i] = 1
+            continue
+        occ[ys[i], xs[i]] = 1
+        stamp = i + 1
+        seen[start] = stamp
+        queue[0] = start
+        head = 0
+        tail = 1
+        while head < tail and not found[i]:
+            current = queue[head]
+            head += 1
+            cx = current % w
+            cy = current // w
+            for d in range(4):
+                nx = cx
+                ny = cy
+                if d == 0:
+                    ny += 1
+                elif d == 1:
+                    nx += 1
+                elif d == 2:
+                    ny -= 1
+                else:
+                    nx -= 1
+                if nx < 0 or nx >= w or ny < 0 or ny >= h:
+                    continue
+                neighbor = ny * w + nx
+                if neighbor == goal:
+                    found[i] = 1
+                    break
+                if seen[neighbor] == stamp or occ[ny, nx]:
+                    continue
+                seen[neighbor] = stamp
+                queue[tail] = neighbor
+                tail += 1
+        occ[ys[i], xs[i]] = 0
+    
+    return found
+
+def _scan_candidates_py(occ, w, h, ex, ey, xs, ys):
+    """
+    Pure-Python candidate scan with the same semantics as
+    _scan_candidates_kernel, run on the grid flattened to bytes.
+    """
+    n = w * h
+    blocked = bytearray(occ.tobytes())  # (h, w) int8 in C order, so blocked[y * w + x]
+    found = np.zeros(len(xs), dtype=np.uint8)
+    start = ey * w + ex
+    for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+        goal = y * w + x
+        if goal == start:
+            found[i] = 1
+            continue
+        blocked[goal] = 1
+        seen = bytearray(n)
+        seen[start] = 1
+        queue = deque([start])
+        while queue and not found[i]:
+            current = queue.popleft()
+            cx = current % w
+            for neighbor, valid in ((current + w, current + w < n),
+                                    (current + 1, cx + 1 < w),
+                                    (current - w, current >= w),
+                                    (current - 1, cx > 0)):
+                if not valid:
+                    continue
+                if neighbor == goal:
+                    found[i] = 1
+                    break
+                if seen[neighbor] or blocked[neighbor]:
+                    continue
+                seen[neighbor] = 1
+                queue.append(neighbor)
+        blocked[goal] = 0
+    
+    return found
+
+if njit is not None:
+    _scan_candidates = njit(cache=True)(_scan_candidates_kernel)
+else:
+    _scan_candidates = _scan_candidates_py
+
+# Occupancy grids kept per LayoutRepair, least recently used dropped first
+_GRID_CACHE_SIZE = 64
+
 class LayoutRepair:
     """Repairs invalid warehouse layouts by moving unreachable shelves"""
     
@@ -9,39 +121,54 @@ class LayoutRepair:
         self.grid_width = grid_width
         self.grid_height = grid_height
         self.validator = LayoutValidator(grid_width, grid_height)
+        self._grid_cache = OrderedDict()
+    
+    def _occupancy_grid(self, shelf_positions):
+        """
+        Occupancy grid from LayoutValidator.build_grid: an int8 array indexed
+        [y, x], with 1 for each in-bounds shelf
+        
+        Grids are memoized on the set of shelf positions. The caller gets its
+        own copy and may mutate it freely.
+        """
+        key = frozenset(map(tuple, shelf_positions))
+        grid = self._grid_cache.get(key)
+        if grid is None:
+            grid = self.validator.build_grid(key)
+            self._grid_cache[key] = grid
+            if len(self._grid_cache) > _GRID_CACHE_SIZE:
+                self._grid_cache.popitem(last=False)
+        else:
+            self._grid_cache.move_to_end(key)
+        return grid.copy()
     
     def find_valid_positions(self, current_shelves, packing_stations, entry_point=(0, 0)):
         """Find valid positions for shelves that don't block paths"""
-        valid_positions = []
+        # Create a grid with current shelves. It is built once; the scan
+        # toggles each candidate in place rather than rebuilding it per cell.
+        grid = self._occupancy_grid(current_shelves)
         
-        # Create a grid with current shelves
-        grid = self.validator.build_grid(current_shelves)
+        # A candidate is never the entry point, so placing it can't block
+        # the entry; if the entry is already blocked nothing is valid
+        if grid[entry_point[1], entry_point[0]] == 1:
+            return []
         
-        # Check each position in the grid
-        for y in range(self.grid_height):
-            for x in range(self.grid_width):
-                # Skip if position is already occupied
-                if grid[y][x] == 1:
-                    continue
-                
-                # Skip if it's the entry point or a packing station
-                if (x, y) == entry_point or (x, y) in packing_stations:
-                    continue
-                
-                # Test if this position would create a valid layout
-                test_shelves = current_shelves + [(x, y)]
-                test_grid = self.validator.build_grid(test_shelves)
-                
-                # Check if entry point is still accessible
-                if test_grid[entry_point[1]][entry_point[0]] == 1:
-                    continue
-                
-                # Check if this position is reachable from entry
-                path = self.validator.a_star(entry_point, (x, y), test_grid)
-                if path is not None:
-                    valid_positions.append((x, y))
+        # Candidates are free cells other than the entry point and the
+        # packing stations, found with one mask instead of a per-cell check
+        forbidden = grid.astype(bool)
+        forbidden[entry_point[1], entry_point[0]] = True
+        for sx, sy in packing_stations:
+            if 0 <= sx < self.grid_width and 0 <= sy < self.grid_height:
+                forbidden[sy, sx] = True
+        ys, xs = np.nonzero(~forbidden)
         
-        return valid_positions
+        # Test if each position would create a valid layout: check it is
+        # reachable from entry with a shelf placed on it. Survivors keep
+        # row-major order.
+        reached = _scan_candidates(grid, self.grid_width, self.grid_height,
+                                   entry_point[0], entry_point[1],
+                                   xs.astype(np.int32), ys.astype(np.int32)).astype(bool)
+        return list(zip(xs[reached].tolist(), ys[reached].tolist()))
     
     def repair_layout(self, shelf_positions, packing_stations, entry_point=(0, 0)):
         """
@@ -68,7 +195,8 @@ class LayoutRepair:
         
         # Get unreachable shelves
         unreachable_shelves = validation['unreachable_shelves']
-        reachable_shelves = [s for s in shelf_positions if s not in unreachable_shelves]
+        unreachable_set = set(unreachable_shelves)
+        reachable_shelves = [s for s in shelf_positions if s not in unreachable_set]
         
         if not unreachable_shelves:
             return {
@@ -118,15 +246,12 @@ class LayoutRepair:
         if not valid_positions:
             return None
         
-        # Calculate distances to original position
-        distances = []
-        for pos in valid_positions:
-            distance = abs(pos[0] - original_shelf[0]) + abs(pos[1] - original_shelf[1])
-            distances.append((distance, pos))
-        
-        # Sort by distance and choose the closest
-        distances.sort()
-        return distances[0][1]
+        # Choose the closest to the original position, ties going to the
+        # smallest (x, y) as the previous sort-based selection did.
+        # The positions arrive as a list of tuples; converting them to an
+        # array for a vectorized argmin costs more than this single pass.
+        ox, oy = original_shelf
+        return min(valid_positions, key=lambda p: (abs(p[0] - ox) + abs(p[1] - oy), p))
     
     def create_valid_layout(self, num_shelves, packing_stations, entry_point=(0, 0)):
         """
@@ -139,24 +264,22 @@ class LayoutRepair:
                 'message': str
             }
         """
-        shelves = []
         attempts = 0
         max_attempts = 2000  # Increased attempts
+        station_set = set(packing_stations)
         
         # Start with a simple pattern that's guaranteed to work
         # Place shelves in a grid pattern, avoiding entry and stations
-        base_positions = []
-        for y in range(2, self.grid_height - 1):  # Start from row 2 to avoid entry row
-            for x in range(1, self.grid_width - 1):
-                if (x, y) not in packing_stations and (x, y) != entry_point:
-                    base_positions.append((x, y))
+        free = np.ones((self.grid_height, self.grid_width), dtype=bool)
+        for sx, sy in [*station_set, entry_point]:
+            if 0 <= sx < self.grid_width and 0 <= sy < self.grid_height:
+                free[sy, sx] = False
+        # Start from row 2 to avoid entry row, and keep off the other edges
+        ys, xs = np.nonzero(free[2:self.grid_height - 1, 1:self.grid_width - 1])
+        base_positions = list(zip((xs + 1).tolist(), (ys + 2).tolist()))
         
-        # Shuffle the positions
-        random.shuffle(base_positions)
-        
-        # Take the first num_shelves positions
-        for pos in base_positions[:num_shelves]:
-            shelves.append(pos)
+        # Take num_shelves of the positions at random
+        shelves = random.sample(base_positions, min(num_shelves, len(base_positions)))
         
         # Validate the created layout
         if shelves:
@@ -168,8 +291,12 @@ class LayoutRepair:
                     'message': f"Successfully created valid layout with {len(shelves)} shelves"
                 }
         
-        # If the simple approach failed, try random placement
+        # If the simple approach failed, try random placement. The grid of
+        # placed shelves is kept in step so each candidate can be screened
+        # with a cheap search before the full validation.
         shelves = []
+        shelves_set = set()
+        grid = self._occupancy_grid(shelves)
         while len(shelves) < num_shelves and attempts < max_attempts:
             attempts += 1
             
@@ -178,11 +305,18 @@ class LayoutRepair:
             y = random.randint(1, self.grid_height - 2)
             
             # Skip if position is already occupied
-            if (x, y) in shelves:
+            if (x, y) in shelves_set:
                 continue
             
             # Skip if it's the entry point or a packing station
-            if (x, y) == entry_point or (x, y) in packing_stations:
+            if (x, y) == entry_point or (x, y) in station_set:
+                continue
+            
+            # A layout where the new shelf can't be reached from the entry
+            # is never valid, so skip the full validation for it
+            if not _scan_candidates(grid, self.grid_width, self.grid_height,
+                                    entry_point[0], entry_point[1],
+                                    np.array([x], dtype=np.int32), np.array([y], dtype=np.int32))[0]:
                 continue
             
             # Test if this position creates a valid layout
@@ -191,6 +325,8 @@ class LayoutRepair:
             
             if validation['valid']:
                 shelves.append((x, y))
+                shelves_set.add((x, y))
+                grid[y, x] = 1
         
         if len(shelves) == num_shelves:
             return {
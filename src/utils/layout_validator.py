@@ -1,7 +1,112 @@
 import numpy as np
 from collections import deque
+from itertools import chain
 import heapq
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Distance-field value for cells a search never reached
+_UNREACHED = np.iinfo(np.int32).max
+
+# a_star hands queries whose endpoints are further apart than this (in
+# Manhattan distance) to a_star_bidirectional
+_BIDIRECTIONAL_MIN_DISTANCE = 20
+
+# 4-connected moves as (dx, dy), shared by every search and neighbour scan.
+# _DIR_OFFSETS is the same table as an array for the numba kernel, which
+# reads it as a compile-time constant.
+_DIRS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+_DIR_OFFSETS = np.array(_DIRS, dtype=np.int32)
+
+def _astar_kernel(grid, sx, sy, gx, gy, w, h):
+    """
+    A* over an (h, w) grid from (sx, sy) to (gx, gy), with the same moves
+    as LayoutValidator.a_star. Returns the flat parent array of cell
+    indices (y * w + x): the start is its own parent, and cells never
+    reached are -1, so parent[goal] == -1 means there is no path.
+
+    The open set is a hand-rolled binary heap of int64 keys packing
+    (f << 32) | cell, since heapq isn't available in nopython mode.
+    """
+    n = w * h
+    parent = np.full(n, -1, dtype=np.int32)
+    g_score = np.full(n, np.iinfo(np.int32).max, dtype=np.int32)
+    closed = np.zeros(n, dtype=np.uint8)
+    # A cell is pushed at most once per neighbour that improves it
+    heap = np.empty(4 * n + 1, dtype=np.int64)
+    size = 0
+
+    start = sy * w + sx
+    goal = gy * w + gx
+    parent[start] = start
+    g_score[start] = 0
+    heap[0] = (np.int64(abs(sx - gx) + abs(sy - gy)) << 32) | start
+    size = 1
+
+    while size > 0:
+        current = np.int32(heap[0] & 0xFFFFFFFF)
+        # Pop: move the last key to the root and sift it down
+        size -= 1
+        last = heap[size]
+        i = 0
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if heap[child] >= last:
+                break
+            heap[i] = heap[child]
+            i = child
+        heap[i] = last
+
+        if current == goal:
+            break
+        if closed[current]:
+            continue
+        closed[current] = 1
+        cx = current % w
+        cy = current // w
+
+        for d in range(4):
+            nx = cx + _DIR_OFFSETS[d, 0]
+            ny = cy + _DIR_OFFSETS[d, 1]
+            if nx < 0 or nx >= w or ny < 0 or ny >= h:
+                continue
+            if grid[ny, nx] == 1:  # Blocked by shelf
+                continue
+            neighbor = ny * w + nx
+            if closed[neighbor]:
+                continue
+            tentative = g_score[current] + 1
+            if tentative < g_score[neighbor]:
+                g_score[neighbor] = tentative
+                parent[neighbor] = current
+                # Push: append the key and sift it up
+                key = (np.int64(tentative + abs(nx - gx) + abs(ny - gy)) << 32) | neighbor
+                i = size
+                size += 1
+                while i > 0:
+                    up = (i - 1) // 2
+                    if heap[up] <= key:
+                        break
+                    heap[i] = heap[up]
+                    i = up
+                heap[i] = key
+
+    return parent
+
+# There is no pure-Python twin: without numba, a_star falls back to jump
+# point search and bidirectional A*, which beat a cell-by-cell loop in Python
+if njit is not None:
+    _astar_numba = njit(cache=True)(_astar_kernel)
+else:
+    _astar_numba = None
+
 class LayoutValidator:
     """Validates warehouse layouts for reachability and feasibility"""
     
@@ -10,42 +115,286 @@ class LayoutValidator:
         self.grid_height = grid_height
         
     def build_grid(self, shelf_positions):
-        """Build grid from shelf positions"""
-        grid = [[0 for _ in range(self.grid_width)] for _ in range(self.grid_height)]
-        for x, y in shelf_positions:
-            if 0 <= x < self.grid_width and 0 <= y < self.grid_height:
-                grid[y][x] = 1  # 1 = blocked (shelf)
+        """
+        Build grid from shelf positions, as an int8 (grid_height, grid_width)
+        array indexed [y, x] with 1 = blocked (shelf). Out-of-bounds shelves
+        are ignored.
+        """
+        grid = np.zeros((self.grid_height, self.grid_width), dtype=np.int8)
+        positions = np.fromiter(chain.from_iterable(shelf_positions), dtype=np.intp).reshape(-1, 2)
+        xs, ys = positions[:, 0], positions[:, 1]
+        inside = (xs >= 0) & (xs < self.grid_width) & (ys >= 0) & (ys < self.grid_height)
+        grid[ys[inside], xs[inside]] = 1
         return grid
     
+    def _blocked_cells(self, grid):
+        """
+        The grid flattened to bytes, blocked[y * grid_width + x]. The
+        pure-Python searches index this rather than the array, since
+        indexing bytes is about twice as fast as pulling NumPy scalars.
+        """
+        return np.asarray(grid, dtype=np.int8).tobytes()
+    
+    def _jump(self, x, y, dx, dy, goal, blocked):
+        """
+        Walk from (x, y) in direction (dx, dy) and return the first jump point
+        on the way: the goal, a cell where a side opens up that was blocked
+        beside the previous cell (moving horizontally), or a cell from which
+        a horizontal jump finds a jump point (moving vertically). Returns
+        None if the walk runs into a shelf or the edge first.
+        """
+        width, height = self.grid_width, self.grid_height
+        while True:
+            px = x
+            x, y = x + dx, y + dy
+            if not (0 <= x < width and 0 <= y < height) or blocked[y * width + x] == 1:
+                return None
+            if (x, y) == goal:
+                return (x, y)
+            if dx:
+                for ny in (y - 1, y + 1):
+                    if 0 <= ny < height and blocked[ny * width + x] != 1 and blocked[ny * width + px] == 1:
+                        return (x, y)
+            elif self._jump(x, y, 1, 0, goal, blocked) or self._jump(x, y, -1, 0, goal, blocked):
+                return (x, y)
+    
+    def _jump_directions(self, node, parent, blocked):
+        """Directions to jump in from node, pruned by the direction it was reached from"""
+        if parent is None:
+            return _DIRS
+        x, y = node
+        if node[1] == parent[1]:
+            # Reached horizontally: keep going, and turn only where a side
+            # opens up that the previous cell couldn't reach
+            dx = 1 if x > parent[0] else -1
+            directions = [(dx, 0)]
+            for dy in (-1, 1):
+                ny = y + dy
+                row = ny * self.grid_width
+                if 0 <= ny < self.grid_height and blocked[row + x] != 1 and blocked[row + x - dx] == 1:
+                    directions.append((0, dy))
+            return directions
+        # Reached vertically: keep going, and branch both ways horizontally
+        dy = 1 if y > parent[1] else -1
+        return [(0, dy), (-1, 0), (1, 0)]
+    
     def a_star(self, start, goal, grid):
-        """A* pathfinding algorithm"""
+        """
+        A* pathfinding algorithm, using jump point search for 4-connected
+        grids: only jump points go on the open list, and the straight runs
+        between them are filled back in when the path is rebuilt. With numba
+        installed the search runs in the compiled _astar_kernel instead.
+        """
         def heuristic(a, b):
             return abs(a[0] - b[0]) + abs(a[1] - b[1])
-        
-        open_set = []
-        heapq.heappush(open_set, (0 + heuristic(start, goal), 0, start, [start]))
+
+        if _astar_numba is not None:
+            width = self.grid_width
+            parent = _astar_numba(np.asarray(grid, dtype=np.int8),
+                                  start[0], start[1], goal[0], goal[1],
+                                  width, self.grid_height)
+            node = goal[1] * width + goal[0]
+            if parent[node] == -1:
+                return None  # No path found
+            path = [goal]
+            while parent[node] != node:
+                node = int(parent[node])
+                path.append((node % width, node // width))
+            path.reverse()
+            return path
+
+        if heuristic(start, goal) > _BIDIRECTIONAL_MIN_DISTANCE:
+            return self.a_star_bidirectional(start, goal, grid)
+
+        blocked = self._blocked_cells(grid)
+        # Heap entries are (f, g, node); paths are rebuilt from parent
+        # pointers at the end instead of being copied on every push
+        open_set = [(heuristic(start, goal), 0, start)]
+        came_from = {start: None}
+        g_score = {start: 0}
         closed_set = set()
         
         while open_set:
-            est_total, cost, current, path = heapq.heappop(open_set)
+            est_total, cost, current = heapq.heappop(open_set)
             if current == goal:
+                path = [current]
+                while came_from[current] is not None:
+                    parent = came_from[current]
+                    step_x = (parent[0] > current[0]) - (parent[0] < current[0])
+                    step_y = (parent[1] > current[1]) - (parent[1] < current[1])
+                    while current != parent:
+                        current = (current[0] + step_x, current[1] + step_y)
+                        path.append(current)
+                path.reverse()
                 return path
             if current in closed_set:
                 continue
             closed_set.add(current)
             x, y = current
             
-            for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
+            for dx, dy in self._jump_directions(current, came_from[current], blocked):
+                jump_point = self._jump(x, y, dx, dy, goal, blocked)
+                if jump_point is None or jump_point in closed_set:
+                    continue
+                tentative = cost + heuristic(current, jump_point)
+                if tentative < g_score.get(jump_point, float('inf')):
+                    g_score[jump_point] = tentative
+                    came_from[jump_point] = current
+                    heapq.heappush(open_set, (tentative + heuristic(jump_point, goal), tentative, jump_point))
+        
+        return None  # No path found
+
+    def a_star_bidirectional(self, start, goal, grid):
+        """
+        A* run from both ends at once, for long queries. Each step expands
+        the frontier with the smaller key, and the search stops once the two
+        frontiers together can't beat the best start-goal path found through
+        a cell both sides have seen. Paths follow the same rules as a_star.
+        """
+        def heuristic(a, b):
+            return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+        if start == goal:
+            return [start]
+        blocked = self._blocked_cells(grid)
+        width = self.grid_width
+        if blocked[goal[1] * width + goal[0]] == 1:
+            return None  # a_star never steps onto a shelf, the goal included
+
+        # Both sides order their open heaps by the same averaged potential,
+        # (h_goal - h_start) / 2 forwards and its negation backwards, doubled
+        # to stay in integers. That keeps the two searches consistent with
+        # each other, so they can stop as soon as the smallest keys on each
+        # side add up to the best path found. Ties go to the deeper cell.
+        def key(node, g, sign):
+            return 2 * g + sign * (heuristic(node, goal) - heuristic(node, start))
+
+        # Per direction: open heap of (key, -g, node), g scores, parent
+        # pointers and closed set. The backward search walks the same moves
+        # in reverse.
+        open_f = [(key(start, 0, 1), 0, start)]
+        open_b = [(key(goal, 0, -1), 0, goal)]
+        g_f, g_b = {start: 0}, {goal: 0}
+        came_from_f, came_from_b = {start: None}, {goal: None}
+        closed_f, closed_b = set(), set()
+        best, meet = float('inf'), None
+
+        while open_f and open_b:
+            for open_set, closed_set in ((open_f, closed_f), (open_b, closed_b)):
+                while open_set and open_set[0][2] in closed_set:
+                    heapq.heappop(open_set)
+            if not open_f or not open_b:
+                break
+            if open_f[0][0] + open_b[0][0] >= 2 * best:
+                break
+
+            if open_f[0][0] <= open_b[0][0]:
+                open_set, g_score, came_from, closed_set = open_f, g_f, came_from_f, closed_f
+                other_g, sign = g_b, 1
+            else:
+                open_set, g_score, came_from, closed_set = open_b, g_b, came_from_b, closed_b
+                other_g, sign = g_f, -1
+
+            _, neg_cost, current = heapq.heappop(open_set)
+            cost = -neg_cost
+            closed_set.add(current)
+            x, y = current
+
+            for dx, dy in _DIRS:
                 nx, ny = x + dx, y + dy
-                if 0 <= nx < self.grid_width and 0 <= ny < self.grid_height:
-                    if grid[ny][nx] == 1:  # Blocked by shelf
-                        continue
+                if 0 <= nx < width and 0 <= ny < self.grid_height:
                     neighbor = (nx, ny)
+                    # The start may sit on a shelf; every other cell on the
+                    # path must be free
+                    if blocked[ny * width + nx] == 1 and neighbor != start:
+                        continue
                     if neighbor in closed_set:
                         continue
-                    heapq.heappush(open_set, (cost+1+heuristic(neighbor, goal), cost+1, neighbor, path+[neighbor]))
+                    tentative = cost + 1
+                    if tentative < g_score.get(neighbor, float('inf')):
+                        g_score[neighbor] = tentative
+                        came_from[neighbor] = current
+                        heapq.heappush(open_set, (key(neighbor, tentative, sign), -tentative, neighbor))
+                        if neighbor in other_g and tentative + other_g[neighbor] < best:
+                            best, meet = tentative + other_g[neighbor], neighbor
+
+        if meet is None:
+            return None  # No path found
+
+        # Forward half up to the meeting cell, then the backward half from it
+        path = []
+        node = meet
+        while node is not None:
+            path.append(node)
+            node = came_from_f[node]
+        path.reverse()
+        node = came_from_b[meet]
+        while node is not None:
+            path.append(node)
+            node = came_from_b[node]
+        return path
+
+    def _bfs_distance_field(self, grid, sources):
+        """
+        Shortest-path lengths from any of the sources to every cell, as an
+        int32 (grid_height, grid_width) array with _UNREACHED for cells that
+        can't be reached. Moves follow a_star: sources are expanded even if
+        occupied, and no other occupied cell is entered.
+        """
+        width, height = self.grid_width, self.grid_height
+        n = width * height
+        blocked = self._blocked_cells(grid)
+        dist = [_UNREACHED] * n
+        queue = deque()
+        for x, y in sources:
+            if 0 <= x < width and 0 <= y < height and dist[y * width + x] == _UNREACHED:
+                dist[y * width + x] = 0
+                queue.append(y * width + x)
         
-        return None  # No path found
+        # Cells are flat indices y * width + x, so neighbours are one add away
+        while queue:
+            current = queue.popleft()
+            next_dist = dist[current] + 1
+            cx = current % width
+            for neighbor, valid in ((current - 1, cx > 0),
+                                    (current + 1, cx + 1 < width),
+                                    (current - width, current >= width),
+                                    (current + width, current + width < n)):
+                if not valid or blocked[neighbor] == 1 or dist[neighbor] != _UNREACHED:
+                    continue
+                dist[neighbor] = next_dist
+                queue.append(neighbor)
+        
+        return np.array(dist, dtype=np.int32).reshape(height, width)
+    
+    def _adjacent_distance(self, field, cell):
+        """Smallest distance-field value among the in-bounds 4-neighbours of cell"""
+        best = _UNREACHED
+        for dx, dy in _DIRS:
+            nx, ny = cell[0] + dx, cell[1] + dy
+            if 0 <= nx < self.grid_width and 0 <= ny < self.grid_height:
+                best = min(best, int(field[ny, nx]))
+        return best
+    
+    def _adjacent_distances(self, field, xs, ys):
+        """
+        _adjacent_distance for many cells at once: an int32 array with the
+        smallest distance-field value next to each (xs[i], ys[i]), or
+        _UNREACHED. Cells just outside the grid still see their in-bounds
+        neighbour.
+        """
+        height, width = field.shape
+        padded = np.full((height + 4, width + 4), _UNREACHED, dtype=np.int32)
+        padded[2:-2, 2:-2] = field
+        # adjacent[y + 1, x + 1] covers cells from (-1, -1) to (width, height)
+        adjacent = np.minimum.reduce([
+            padded[1:-1, :-2], padded[1:-1, 2:],
+            padded[:-2, 1:-1], padded[2:, 1:-1],
+        ])
+        distances = np.full(len(xs), _UNREACHED, dtype=np.int32)
+        near = (xs >= -1) & (xs <= width) & (ys >= -1) & (ys <= height)
+        distances[near] = adjacent[ys[near] + 1, xs[near] + 1]
+        return distances
     
     def validate_reachability(self, shelf_positions, packing_stations, entry_point=(0, 0)):
         """
@@ -65,7 +414,7 @@ class LayoutValidator:
         unreachable_stations = []
         
         # Check if entry point is blocked
-        if grid[entry_point[1]][entry_point[0]] == 1:
+        if grid[entry_point[1], entry_point[0]] == 1:
             issues.append(f"Entry point {entry_point} is blocked by a shelf")
             return {
                 'valid': False,
@@ -74,30 +423,40 @@ class LayoutValidator:
                 'issues': issues
             }
         
-        # Check reachability of each shelf from entry point
+        # Distances from the entry point, computed once for every query below
+        dist_from_entry = self._bfs_distance_field(grid, [entry_point])
+        
+        # Check reachability of each shelf from entry point. A shelf is picked
+        # from an aisle, so it is reachable when a cell next to it is.
         for shelf in shelf_positions:
-            path = self.a_star(entry_point, shelf, grid)
-            if path is None:
+            in_bounds = 0 <= shelf[0] < self.grid_width and 0 <= shelf[1] < self.grid_height
+            if not in_bounds or self._adjacent_distance(dist_from_entry, shelf) == _UNREACHED:
                 unreachable_shelves.append(shelf)
                 issues.append(f"Shelf at {shelf} is unreachable from entry point")
         
+        unreachable_set = set(unreachable_shelves)
+        reachable_shelves = [shelf for shelf in shelf_positions if shelf not in unreachable_set]
+        
         # Check reachability of packing stations from shelves
         for station in packing_stations:
             station_reachable = False
+            station_free = grid[station[1], station[0]] != 1
             # First check if station is reachable from entry point directly
-            if grid[station[1]][station[0]] != 1:  # Station not blocked
-                path_from_entry = self.a_star(entry_point, station, grid)
-                if path_from_entry is not None:
-                    station_reachable = True
+            if station_free:
+                station_reachable = dist_from_entry[station[1], station[0]] != _UNREACHED
             
-            # If not reachable from entry, check from reachable shelves
+            # If not reachable from entry, check from reachable shelves: a
+            # path from a shelf leaves through one of its neighbours, or
+            # the shelf stands on the station itself
             if not station_reachable:
-                for shelf in shelf_positions:
-                    if shelf not in unreachable_shelves:  # Only check from reachable shelves
-                        path = self.a_star(shelf, station, grid)
-                        if path is not None:
-                            station_reachable = True
-                            break
+                if station_free:
+                    dist_from_station = self._bfs_distance_field(grid, [station])
+                    station_reachable = any(
+                        self._adjacent_distance(dist_from_station, shelf) != _UNREACHED
+                        for shelf in reachable_shelves
+                    )
+                else:
+                    station_reachable = station in set(reachable_shelves)
             
             if not station_reachable:
                 unreachable_stations.append(station)
@@ -105,7 +464,7 @@ class LayoutValidator:
         
         # Check if packing stations are blocked
         for station in packing_stations:
-            if grid[station[1]][station[0]] == 1:
+            if grid[station[1], station[0]] == 1:
                 unreachable_stations.append(station)
                 issues.append(f"Packing station {station} is blocked by a shelf")
         
@@ -132,36 +491,46 @@ class LayoutValidator:
         grid = self.build_grid(shelf_positions)
         recommendations = []
         
+        positions = np.asarray(shelf_positions, dtype=np.intp).reshape(-1, 2)
+        xs, ys = positions[:, 0], positions[:, 1]
+        
         # Calculate shelf distribution
         if shelf_positions:
-            x_coords = [pos[0] for pos in shelf_positions]
-            y_coords = [pos[1] for pos in shelf_positions]
-            x_spread = np.std(x_coords)
-            y_spread = np.std(y_coords)
-            total_spread = x_spread + y_spread
+            total_spread = xs.std() + ys.std()
         else:
             total_spread = 0
         
-        # Calculate average distance from entry to shelves
-        total_entry_distance = 0
-        for shelf in shelf_positions:
-            path = self.a_star(entry_point, shelf, grid)
-            if path:
-                total_entry_distance += len(path) - 1
+        # Calculate average distance from entry to shelves, stepping onto
+        # each shelf from the nearest reachable cell next to it. A shelf on
+        # the entry itself counts as 0.
+        dist_from_entry = self._bfs_distance_field(grid, [entry_point])
+        counted = ((xs >= 0) & (xs < self.grid_width) & (ys >= 0) & (ys < self.grid_height) &
+                   ((xs != entry_point[0]) | (ys != entry_point[1])))
+        entry_distances = self._adjacent_distances(dist_from_entry, xs[counted], ys[counted])
+        entry_distances = entry_distances[entry_distances != _UNREACHED]
+        total_entry_distance = int(entry_distances.sum()) + len(entry_distances)
         
         avg_entry_distance = total_entry_distance / len(shelf_positions) if shelf_positions else 0
         
-        # Calculate average distance from shelves to nearest packing station
-        total_station_distance = 0
-        for shelf in shelf_positions:
-            min_distance = float('inf')
-            for station in packing_stations:
-                path = self.a_star(shelf, station, grid)
-                if path:
-                    distance = len(path) - 1
-                    min_distance = min(min_distance, distance)
-            if min_distance != float('inf'):
-                total_station_distance += min_distance
+        # Calculate average distance from shelves to nearest packing station,
+        # with one distance field per open station, folded into a single
+        # nearest-station field. A blocked station can only be "reached" by
+        # the shelf standing on it, at distance 0.
+        station_fields = [
+            self._bfs_distance_field(grid, [station])
+            for station in packing_stations if grid[station[1], station[0]] != 1
+        ]
+        if station_fields:
+            nearest_station = np.stack(station_fields).min(axis=0)
+            station_distances = self._adjacent_distances(nearest_station, xs, ys).astype(np.int64) + 1
+            station_distances[station_distances == _UNREACHED + 1] = 0
+        else:
+            station_distances = np.zeros(len(xs), dtype=np.int64)
+        station_set = set(packing_stations)
+        on_station = np.fromiter((tuple(shelf) in station_set for shelf in shelf_positions),
+                                 dtype=bool, count=len(shelf_positions))
+        station_distances[on_station] = 0
+        total_station_distance = int(station_distances.sum())
         
         avg_station_distance = total_station_distance / len(shelf_positions) if shelf_positions else 0
         
@@ -210,34 +579,27 @@ class LayoutValidator:
             list: List of optimization suggestions
         """
         suggestions = []
+        width = self.grid_width
         grid = self.build_grid(shelf_positions)
+        blocked = self._blocked_cells(grid)
         
         # Check for isolated shelves
         for shelf in shelf_positions:
             neighbors = 0
-            for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
+            for dx, dy in _DIRS:
                 nx, ny = shelf[0] + dx, shelf[1] + dy
-                if 0 <= nx < self.grid_width and 0 <= ny < self.grid_height:
-                    if grid[ny][nx] == 1:  # Adjacent shelf
+                if 0 <= nx < width and 0 <= ny < self.grid_height:
+                    if blocked[ny * width + nx] == 1:  # Adjacent shelf
                         neighbors += 1
             
             if neighbors == 0:
                 suggestions.append(f"Move isolated shelf at {shelf} closer to other shelves")
         
-        # Check for bottlenecks
-        bottleneck_points = []
-        for y in range(self.grid_height):
-            for x in range(self.grid_width):
-                if grid[y][x] == 0:  # Free space
-                    blocked_directions = 0
-                    for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
-                        nx, ny = x + dx, y + dy
-                        if (0 <= nx < self.grid_width and 0 <= ny < self.grid_height and 
-                            grid[ny][nx] == 1):
-                            blocked_directions += 1
-                    
-                    if blocked_directions >= 3:
-                        bottleneck_points.append((x, y))
+        # Check for bottlenecks: free cells with shelves on three or more sides
+        padded = np.pad(grid, 1)
+        blocked_sides = padded[:-2, 1:-1] + padded[2:, 1:-1] + padded[1:-1, :-2] + padded[1:-1, 2:]
+        ys, xs = np.nonzero((grid == 0) & (blocked_sides >= 3))
+        bottleneck_points = list(zip(xs.tolist(), ys.tolist()))
         
         if bottleneck_points:
             suggestions.append(f"Consider removing shelves near bottleneck points: {bottleneck_points[:3]}")
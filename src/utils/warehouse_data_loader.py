@@ -4,6 +4,14 @@ import numpy as np
 import streamlit as st
 from typing import Dict, List, Tuple, Optional
 import os
+import sys
+
+# Interned cell type names: cells built by convert_to_grid_format share these
+# objects, so type comparisons and bucket lookups hit the identity fast path
+_EMPTY = sys.intern('Empty')
+_SHELF = sys.intern('Shelf')
+_STATION = sys.intern('Packing Station')
+_ENTRY_EXIT = sys.intern('Entry/Exit')
 
 class WarehouseDataLoader:
     """Load and convert warehouse layout data from various file formats"""
@@ -49,7 +57,9 @@ class WarehouseDataLoader:
                             'priority': np.random.randint(1, 4)  # 1=low, 2=medium, 3=high
                         }
         
-        # Generate orders
+        # Generate orders. Order ages are collected per item and turned into
+        # timestamps in one step from a single "now".
+        minutes_ago = []
         for order_id in range(1, num_orders + 1):
             # Random number of items per order (1-5)
             num_items = np.random.randint(1, 6)
@@ -69,11 +79,14 @@ class WarehouseDataLoader:
                     'zone': item_info['zone'],
                     'item_type': item_info['item_type'],
                     'priority': item_info['priority'],
-                    'quantity': np.random.randint(1, 4),
-                    'order_timestamp': pd.Timestamp.now() - pd.Timedelta(minutes=np.random.randint(0, 1440))
+                    'quantity': np.random.randint(1, 4)
                 })
+                minutes_ago.append(np.random.randint(0, 1440))
         
-        return pd.DataFrame(orders)
+        orders_df = pd.DataFrame(orders)
+        if orders:
+            orders_df['order_timestamp'] = pd.Timestamp.now() - pd.to_timedelta(minutes_ago, unit='m')
+        return orders_df
     
     def save_sample_orders(self):
         """Save sample order data for all layouts"""
@@ -428,60 +441,68 @@ class WarehouseDataLoader:
         for y in range(grid_height):
             for x in range(grid_width):
                 grid_data.append({
-                    'x': x, 'y': y, 'type': 'Empty', 'color': 'white', 'symbol': 'square'
+                    'x': x, 'y': y, 'type': _EMPTY, 'color': 'white', 'symbol': 'square'
                 })
         
+        # Cells are stored row-major, so a position maps directly to its index
+        def cell_at(x, y):
+            if 0 <= x < grid_width and 0 <= y < grid_height:
+                return grid_data[y * grid_width + x]
+            return None
+        
         # Add shelves
         for shelf in layout_data.get('shelves', []):
             x, y = shelf['x'], shelf['y']
             zone = shelf.get('zone', 'general')
             zone_color = layout_data.get('zones', {}).get(zone, {}).get('color', 'brown')
             
-            # Find and update the grid cell
-            for cell in grid_data:
-                if cell['x'] == x and cell['y'] == y:
-                    cell.update({
-                        'type': 'Shelf',
-                        'color': zone_color,
-                        'symbol': 'square',
-                        'zone': zone,
-                        'capacity': shelf.get('capacity', 100),
-                        'current_items': shelf.get('current_items', 50)
-                    })
-                    break
+            cell = cell_at(x, y)
+            if cell is not None:
+                cell.update({
+                    'type': _SHELF,
+                    'color': zone_color,
+                    'symbol': 'square',
+                    'zone': zone,
+                    'capacity': shelf.get('capacity', 100),
+                    'current_items': shelf.get('current_items', 50)
+                })
         
         # Add packing stations
         for station in layout_data.get('stations', []):
-            x, y = station['x'], station['y']
-            
-            for cell in grid_data:
-                if cell['x'] == x and cell['y'] == y:
-                    cell.update({
-                        'type': 'Packing Station',
-                        'color': 'green',
-                        'symbol': 'diamond',
-                        'station_type': station.get('type', 'standard'),
-                        'capacity': station.get('capacity', 50)
-                    })
-                    break
+            cell = cell_at(station['x'], station['y'])
+            if cell is not None:
+                cell.update({
+                    'type': _STATION,
+                    'color': 'green',
+                    'symbol': 'diamond',
+                    'station_type': station.get('type', 'standard'),
+                    'capacity': station.get('capacity', 50)
+                })
         
         # Add entry/exit point
         entry_exit = layout_data.get('entry_exit', {'x': 0, 'y': 0})
-        x, y = entry_exit['x'], entry_exit['y']
-        
+        cell = cell_at(entry_exit['x'], entry_exit['y'])
+        if cell is not None:
+            cell.update({
+                'type': _ENTRY_EXIT,
+                'color': 'blue',
+                'symbol': 'circle'
+            })
+        
+        # Pre-categorize cells so callers don't have to scan the grid
+        buckets = {_SHELF: [], _STATION: [], _ENTRY_EXIT: []}
         for cell in grid_data:
-            if cell['x'] == x and cell['y'] == y:
-                cell.update({
-                    'type': 'Entry/Exit',
-                    'color': 'blue',
-                    'symbol': 'circle'
-                })
-                break
+            bucket = buckets.get(cell['type'])
+            if bucket is not None:
+                bucket.append(cell)
         
         return {
             'grid_width': grid_width,
             'grid_height': grid_height,
             'grid_data': grid_data,
+            'shelves': buckets[_SHELF],
+            'stations': buckets[_STATION],
+            'entry_exit': buckets[_ENTRY_EXIT][0] if buckets[_ENTRY_EXIT] else None,
             'layout_name': layout_data.get('name', 'Unknown Layout'),
             'layout_description': layout_data.get('description', ''),
             'layout_type': layout_data.get('layout_type', 'Custom'),
@@ -560,11 +581,13 @@ def load_sample_warehouse_data():
                 
                 st.session_state.custom_layout_state.update({
                     'grid_data': grid_data['grid_data'],
-                    'shelves': [cell for cell in grid_data['grid_data'] if cell['type'] == 'Shelf'],
-                    'stations': [cell for cell in grid_data['grid_data'] if cell['type'] == 'Packing Station'],
-                    'entry_exit': next((cell for cell in grid_data['grid_data'] if cell['type'] == 'Entry/Exit'), None)
+                    'shelves': grid_data['shelves'],
+                    'stations': grid_data['stations'],
+                    'entry_exit': grid_data['entry_exit']
                 })
                 
+                st.session_state['_has_sample_layout'] = True
+                
                 st.success(f"✅ Loaded {grid_data['layout_name']} successfully!")
                 st.rerun()
 